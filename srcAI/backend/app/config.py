@@ -10,9 +10,132 @@ ALLOWED_ORIGINS = os.getenv(
 # Vector DB toggle
 CHROMA_ENABLED = os.getenv("ENABLE_CHROMA", "0") == "1"
 
+# Vector store backend behind ENABLE_CHROMA: "chroma" (persistent Chroma client) or
+# "local" (quantized, memory-mapped NumPy index under VECTOR_STORE_PATH, shared
+# read-only by every worker process). Quantization and IVF lists apply when the
+# local store is created or compacted; VECTOR_IVF_LISTS=0 searches exhaustively.
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma").lower()
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "./vector_index")
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "int8").lower()
+VECTOR_IVF_LISTS = int(os.getenv("VECTOR_IVF_LISTS", "0"))
+VECTOR_IVF_PROBES = int(os.getenv("VECTOR_IVF_PROBES", "8"))
+
 # Ollama
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 MODEL_NAME = os.getenv("MODEL_NAME", "llama3.2")
+# Comma-separated Ollama hosts (base or /api/generate URLs); defaults to OLLAMA_URL
+OLLAMA_URLS = [u.strip() for u in os.getenv("OLLAMA_URLS", OLLAMA_URL).split(",") if u.strip()]
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10"))
+OLLAMA_BREAKER_THRESHOLD = int(os.getenv("OLLAMA_BREAKER_THRESHOLD", "3"))
+OLLAMA_BREAKER_COOLDOWN = float(os.getenv("OLLAMA_BREAKER_COOLDOWN", "30"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+OLLAMA_KEEPALIVE_CONNECTIONS = int(os.getenv("OLLAMA_KEEPALIVE_CONNECTIONS", "16"))
+# How long Ollama keeps the model loaded after a request (Ollama duration string)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Prompt assembly: model context window (sent as num_ctx), tokens reserved for the
+# answer, cap on retrieved context, and whether only scenario-relevant sentences are kept
+MODEL_CONTEXT_TOKENS = int(os.getenv("MODEL_CONTEXT_TOKENS", "4096"))
+PROMPT_RESPONSE_TOKENS = int(os.getenv("PROMPT_RESPONSE_TOKENS", "1024"))
+PROMPT_MAX_CONTEXT_TOKENS = int(os.getenv("PROMPT_MAX_CONTEXT_TOKENS", "1500"))
+PROMPT_EXTRACT_SENTENCES = os.getenv("PROMPT_EXTRACT_SENTENCES", "1") == "1"
+PROMPT_DEDUP_THRESHOLD = float(os.getenv("PROMPT_DEDUP_THRESHOLD", "0.6"))
+# Constrain generations to the analysis JSON schema (Ollama 0.5+ structured outputs)
+OLLAMA_STRUCTURED_OUTPUT = os.getenv("OLLAMA_STRUCTURED_OUTPUT", "1") == "1"
+# Retry interval for the startup model preload while Ollama is unreachable
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+# Admission control: total concurrent generations (size to backend capacity),
+# and per-lane "name:max_concurrent:max_queued" in priority order
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", str(4 * len(OLLAMA_URLS))))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "30"))
+ADMISSION_LANES = [
+    (name, int(limit), int(queue))
+    for name, limit, queue in (
+        lane.strip().split(":")
+        for lane in os.getenv("ADMISSION_LANES", "high:4:64,normal:3:32,bulk:2:256").split(",")
+        if lane.strip()
+    )
+]
+
+# Max generations a single /api/analyze/batch request keeps in flight
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Max scenarios one /api/analyze/batch request may contain
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
 
 # Files
 REPORTS_DIR = os.getenv("REPORTS_DIR", "reports")
+REPORT_STORE_MAX_BYTES = int(float(os.getenv("REPORT_STORE_MAX_MB", "1024")) * 1024 * 1024)
+REPORT_STORE_MAX_AGE = float(os.getenv("REPORT_STORE_MAX_AGE_DAYS", "30")) * 86400
+
+# PDF rendering processes (0 renders in the thread pool instead)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+# Max analyses one /api/generate-report/bulk request may render
+REPORT_BULK_MAX_ITEMS = int(os.getenv("REPORT_BULK_MAX_ITEMS", "100"))
+
+# Query embeddings: LRU cache plus micro-batching of concurrent requests
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+EMBEDDING_PROCESSES = os.getenv("EMBEDDING_PROCESSES", "0") == "1"
+
+# Hybrid retrieval: in-memory BM25 index fused with vector results (reciprocal-rank
+# fusion over RETRIEVAL_CANDIDATES from each side), then an optional cheap rerank
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))
+RETRIEVAL_RRF_K = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+RETRIEVAL_RERANK = os.getenv("RETRIEVAL_RERANK", "1") == "1"
+
+# Knowledge base ingestion (/api/ingest only reads below INGEST_ROOT)
+INGEST_ROOT = os.getenv("INGEST_ROOT", "knowledge_base")
+INGEST_MANIFEST = os.getenv(
+    "INGEST_MANIFEST",
+    f"{VECTOR_STORE_PATH}/ingest_manifest.json" if VECTOR_STORE == "local" else "./chroma_db/ingest_manifest.json",
+)
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "200"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Background jobs (set JOB_STORE_DB to a file path so jobs survive restarts)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_STORE_DB = os.getenv("JOB_STORE_DB", "")
+JOB_TTL = float(os.getenv("JOB_TTL", "86400"))
+
+# Case store: every analysis returned to a client, searchable and re-reportable by case_id
+CASE_STORE_DB = os.getenv("CASE_STORE_DB", "cases.sqlite3")
+
+# Model cascade: analyses go to CASCADE_SMALL_MODEL first and escalate to MODEL_NAME
+# when the small answer fails schema validation, has an escalated severity, contradicts
+# a pre-classifier prediction of at least CASCADE_MIN_CONFIDENCE, or (when no confident
+# prediction confirms it) disagrees with CASCADE_SELF_CONSISTENCY extra small-model
+# samples. Each generation takes its own admission slot. Streaming uses MODEL_NAME.
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+CASCADE_SMALL_MODEL = os.getenv("CASCADE_SMALL_MODEL", "llama3.2:1b")
+CASCADE_ESCALATE_SEVERITIES = {
+    s.strip().capitalize() for s in os.getenv("CASCADE_ESCALATE_SEVERITIES", "High").split(",") if s.strip()
+}
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.8"))
+CASCADE_SELF_CONSISTENCY = int(os.getenv("CASCADE_SELF_CONSISTENCY", "0"))
+
+# Local pre-classifier (train with train_classifier.py): "shadow" attaches its
+# prediction to LLM analyses, "fast" answers scenarios at or above the threshold
+# without retrieval or the LLM, "off" disables it. CLASSIFIER_ENRICH queues a full
+# LLM analysis job for every fast answer.
+CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "shadow").lower()
+CLASSIFIER_MODEL = os.getenv("CLASSIFIER_MODEL", "classifier.pkl")
+CLASSIFIER_THRESHOLD = float(os.getenv("CLASSIFIER_THRESHOLD", "0.9"))
+CLASSIFIER_ENRICH = os.getenv("CLASSIFIER_ENRICH", "0") == "1"
+CLASSIFIER_MIN_EXAMPLES = int(os.getenv("CLASSIFIER_MIN_EXAMPLES", "5"))
+
+# Analysis result cache (set ANALYSIS_CACHE_DB to a file path to enable the SQLite tier)
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "512"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+ANALYSIS_CACHE_DB = os.getenv("ANALYSIS_CACHE_DB", "")
+ANALYSIS_CACHE_DISK_SIZE = int(os.getenv("ANALYSIS_CACHE_DISK_SIZE", "10000"))
+
+# Semantic (near-duplicate) cache; needs the embedding model but not the Chroma collection
+SEMANTIC_CACHE_ENABLED = os.getenv("ENABLE_SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
@@ -1,21 +1,99 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
 import json
+import time
 import uuid
+from pathlib import Path
 
-import requests
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+
+from .config import (
+    ALLOWED_ORIGINS,
+    BATCH_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    CASCADE_ENABLED,
+    CHROMA_ENABLED,
+    CLASSIFIER_ENRICH,
+    CLASSIFIER_MODE,
+    CLASSIFIER_THRESHOLD,
+    INGEST_ROOT,
+    MODEL_NAME,
+    REPORT_BULK_MAX_ITEMS,
+)
+from .models import (
+    BulkReportRequest,
+    CasePage,
+    CaseReference,
+    IngestRequest,
+    JobRequest,
+    PreClassification,
+    ThreatScenario,
+    ThreatAnalysis,
+)
+from .services.admission import admission
+from .services.cache import analysis_cache, analysis_cache_key
+from .services.cascade import SERVING_MODEL, cascade_stats, query_cascade
+from .services.cases import get_case_store
+from .services.classifier import threat_classifier
+from .services.embeddings import embedding_service
+from .services.health import health_monitor
+from .services.ingest import ingest_directory
+from .services.jobs import job_queue
+from .services.lexical import lexical_index
+from .services import metrics
+from .services.metrics import (
+    TimingMiddleware,
+    cache_lookups_total,
+    classifier_agreement_total,
+    fallback_parses_total,
+    fast_path_total,
+    percentile,
+    stage,
+)
+from .services.ollama_client import (
+    SAMPLING_OPTIONS,
+    close_client,
+    extract_json,
+    query_ollama,
+    router,
+    stream_ollama,
+)
+from .services.pdf_report import render_report, shutdown_pool
+from .services.rag import retrieve_chunks, retrieve_chunks_batch
+from .services.report_store import report_key, report_store
+from .services.semantic_cache import semantic_cache
+from .services.singleflight import generation_flights
+from .services.warmup import warm_up, warmup_state
 
-from .config import ALLOWED_ORIGINS
-from .models import ThreatScenario, ThreatAnalysis
-from .services.ollama_client import query_ollama
-from .services.pdf_report import generate_pdf_report
-from .services.rag import retrieve_context, vector_status
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(get_case_store)
+    await job_queue.start()
+    await health_monitor.start()
+    warmup_task = asyncio.create_task(warm_up())
+    yield
+    warmup_task.cancel()
+    await health_monitor.stop()
+    await job_queue.stop()
+    await close_client()
+    shutdown_pool()
+    embedding_service.close()
 
-app = FastAPI(title="CyberSentinel API")
 
+app = FastAPI(title="CyberSentinel API", lifespan=lifespan)
+
+app.add_middleware(TimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
@@ -30,72 +108,669 @@ async def root():
     return {"service": "CyberSentinel API", "version": "1.0.0", "status": "operational"}
 
 
+def new_case_id() -> str:
+    return str(uuid.uuid4())[:8]
+
+
+def now_timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_response(response: str) -> dict | None:
+    try:
+        analysis_data = json.loads(response)
+    except json.JSONDecodeError:
+        return None
+    return analysis_data if isinstance(analysis_data, dict) else None
+
+
+FALLBACK_RECOMMENDATIONS = (
+    "Review the scenario manually",
+    "Implement standard security protocols",
+)
+
+
+def build_analysis(
+    scenario_text: str, response: str, sources: list[str], token_count: int, model: str | None = MODEL_NAME
+) -> ThreatAnalysis:
+    with stage("parse"):
+        analysis_data = parse_response(response)
+    if analysis_data is None:
+        fallback_parses_total.inc()
+        analysis_data = {
+            "threat_type": "Unknown",
+            "severity": "Medium",
+            "analysis": response,
+            "recommendations": list(FALLBACK_RECOMMENDATIONS),
+        }
+
+    return ThreatAnalysis(
+        case_id=new_case_id(),
+        scenario=scenario_text,
+        threat_type=analysis_data.get("threat_type", "Unknown"),
+        severity=analysis_data.get("severity", "Medium"),
+        analysis=analysis_data.get("analysis", "Analysis unavailable"),
+        recommendations=analysis_data.get("recommendations", []),
+        context_sources=sources,
+        timestamp=now_timestamp(),
+        token_usage=token_count,
+        model=model,
+    )
+
+
+def cache_key_for(scenario_text: str, chunk_ids: list[str], model: str = SERVING_MODEL) -> str:
+    return analysis_cache_key(scenario_text, chunk_ids, model, SAMPLING_OPTIONS)
+
+
+async def cache_call(method, *args):
+    # The SQLite tier reads and writes disk (a hit also updates its access time),
+    # so with it enabled cache calls run in the threadpool, not on the event loop.
+    if analysis_cache.persistent:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+async def lookup_cached(scenario_text: str, sources: list[str], key: str):
+    # Exact match first, then a near-duplicate by embedding. The scenario vector
+    # is returned so a fresh result can be added to the semantic index.
+    cached = await cache_call(analysis_cache.get, key)
+    cache_lookups_total.inc(cache="exact", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        analysis = build_analysis(
+            scenario_text, cached["response"], sources, cached["token_usage"], cached.get("model", MODEL_NAME)
+        )
+        analysis.cache_hit = True
+        return analysis, None
+
+    if not semantic_cache.enabled:
+        return None, None
+    vector = await run_in_threadpool(semantic_cache.embed, scenario_text)
+    if vector is not None:
+        match = semantic_cache.lookup(vector)
+        cache_lookups_total.inc(cache="semantic", result="hit" if match is not None else "miss")
+        if match is not None:
+            stored, _ = match
+            analysis = ThreatAnalysis(
+                **stored,
+                case_id=new_case_id(),
+                scenario=scenario_text,
+                timestamp=now_timestamp(),
+                cache_hit=True,
+            )
+            return analysis, vector
+    return None, vector
+
+
+async def remember_analysis(key: str, vector, response: str, analysis: ThreatAnalysis) -> None:
+    # Fallback parses are not cached so a bad generation is not served again.
+    if parse_response(response) is None:
+        return
+    await cache_call(
+        analysis_cache.set, key, {"response": response, "token_usage": analysis.token_usage, "model": analysis.model}
+    )
+    if vector is not None:
+        semantic_cache.add(
+            vector, analysis.model_dump(exclude={"case_id", "scenario", "timestamp", "cache_hit"})
+        )
+
+
+async def record_case(analysis: ThreatAnalysis) -> None:
+    # case_ids are short random ids; on the rare collision the analysis gets a new one.
+    while not await run_in_threadpool(get_case_store().add, analysis.model_dump()):
+        analysis.case_id = new_case_id()
+
+
+def pre_classify(scenario_text: str) -> dict | None:
+    if CLASSIFIER_MODE not in ("shadow", "fast") or not threat_classifier.ready:
+        return None
+    with stage("classify"):
+        return threat_classifier.predict(scenario_text)
+
+
+def attach_prediction(analysis: ThreatAnalysis, prediction: dict | None) -> None:
+    # Shadow bookkeeping: how often the pre-classifier agrees with the LLM.
+    if prediction is None:
+        return
+    analysis.pre_classification = PreClassification(**prediction)
+    if analysis.cache_hit or analysis.threat_type == "Unknown":
+        return
+    for field in ("threat_type", "severity"):
+        agree = prediction[field].lower() == getattr(analysis, field).strip().lower()
+        classifier_agreement_total.inc(field=field, result="agree" if agree else "disagree")
+
+
+async def fast_path(scenario_text: str, prediction: dict | None) -> ThreatAnalysis | None:
+    # CLASSIFIER_MODE=fast: a confident pre-classification is the answer, without
+    # retrieval or the LLM. CLASSIFIER_ENRICH queues the full analysis as a job.
+    if CLASSIFIER_MODE != "fast" or prediction is None:
+        return None
+    if prediction["confidence"] < CLASSIFIER_THRESHOLD:
+        fast_path_total.inc(result="below_threshold")
+        return None
+    fast_path_total.inc(result="answered")
+    summary = (
+        f"Pre-classified as {prediction['threat_type']} ({prediction['severity']} severity) "
+        f"with {prediction['confidence']:.0%} confidence by the local classifier; "
+        "no LLM analysis was run."
+    )
+    indicators = "; ".join(f"{kind}: {', '.join(values[:5])}" for kind, values in prediction["indicators"].items())
+    if indicators:
+        summary += f" Indicators: {indicators}."
+    analysis = ThreatAnalysis(
+        case_id=new_case_id(),
+        scenario=scenario_text,
+        threat_type=prediction["threat_type"],
+        severity=prediction["severity"],
+        analysis=summary,
+        recommendations=threat_classifier.recommendations(prediction["threat_type"])
+        or list(FALLBACK_RECOMMENDATIONS),
+        context_sources=[],
+        timestamp=now_timestamp(),
+        token_usage=0,
+        fast_path=True,
+        pre_classification=PreClassification(**prediction),
+    )
+    if CLASSIFIER_ENRICH:
+        job = await job_queue.submit("analyze", {"scenario": scenario_text, "priority": "bulk"})
+        analysis.enrichment_job_id = job["id"]
+    await record_case(analysis)
+    return analysis
+
+
+async def run_analysis(
+    scenario_text: str,
+    context: str,
+    sources: list[str],
+    chunk_ids: list[str],
+    lane: str = "normal",
+    prediction: dict | None = None,
+) -> ThreatAnalysis:
+    if prediction is None:
+        prediction = pre_classify(scenario_text)
+    key = cache_key_for(scenario_text, chunk_ids)
+    cached, vector = await lookup_cached(scenario_text, sources, key)
+    if cached is not None:
+        attach_prediction(cached, prediction)
+        await record_case(cached)
+        return cached
+
+    async def generate():
+        if CASCADE_ENABLED:
+            # Takes an admission slot per generation it runs.
+            return await query_cascade(scenario_text, context, prediction, lane)
+        async with admission.slot(lane):
+            response, token_count = await query_ollama(scenario_text, context)
+            return response, token_count, MODEL_NAME
+
+    # Identical requests already generating share that generation; each caller
+    # still gets its own case_id, and only the first one populates the caches.
+    (response, token_count, model), shared = await generation_flights.run(key, generate)
+    analysis = build_analysis(scenario_text, response, sources, token_count, model)
+    if not shared:
+        await remember_analysis(key, vector, response, analysis)
+    attach_prediction(analysis, prediction)
+    await record_case(analysis)
+    return analysis
+
+
 @app.post("/api/analyze", response_model=ThreatAnalysis)
 async def analyze_threat(scenario: ThreatScenario):
     try:
-        context, sources = retrieve_context(scenario.scenario)
-        response, token_count = query_ollama(scenario.scenario, context)
+        prediction = pre_classify(scenario.scenario)
+        fast = await fast_path(scenario.scenario, prediction)
+        if fast is not None:
+            return fast
+        with stage("retrieval"):
+            context, sources, chunk_ids = await run_in_threadpool(retrieve_chunks, scenario.scenario)
+        return await run_analysis(
+            scenario.scenario, context, sources, chunk_ids, lane=scenario.priority, prediction=prediction
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/analyze/batch")
+async def analyze_threat_batch(scenarios: list[ThreatScenario]):
+    # NDJSON: one {"type": "result"} or {"type": "error"} line per scenario in
+    # completion order (with its input "index"), then a {"type": "summary"} line.
+    if len(scenarios) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} scenarios per batch")
+    started = time.perf_counter()
+    texts = [s.scenario for s in scenarios]
+    with stage("retrieval"):
+        retrieved = await run_in_threadpool(retrieve_chunks_batch, texts)
+    semaphore = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
 
+    async def analyze_item(index: int):
+        async with semaphore:
+            item_started = time.perf_counter()
+            context, sources, chunk_ids = retrieved[index]
+            try:
+                analysis = await run_analysis(
+                    texts[index], context, sources, chunk_ids, lane="bulk"
+                )
+                event = {"type": "result", "index": index, "data": analysis.model_dump()}
+            except HTTPException as e:
+                event = {"type": "error", "index": index, "status": e.status_code, "detail": e.detail}
+            except Exception as e:
+                event = {"type": "error", "index": index, "status": 500, "detail": str(e)}
+            return event, time.perf_counter() - item_started
+
+    async def events():
+        tasks = [asyncio.create_task(analyze_item(i)) for i in range(len(texts))]
+        latencies = []
+        failed = 0
         try:
-            analysis_data = json.loads(response)
-        except json.JSONDecodeError:
-            analysis_data = {
-                "threat_type": "Unknown",
-                "severity": "Medium",
-                "analysis": response,
-                "recommendations": [
-                    "Review the scenario manually",
-                    "Implement standard security protocols",
-                ],
+            for next_done in asyncio.as_completed(tasks):
+                event, latency = await next_done
+                latencies.append(latency)
+                failed += event["type"] == "error"
+                yield json.dumps(event) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.perf_counter() - started
+        yield json.dumps(
+            {
+                "type": "summary",
+                "count": len(texts),
+                "succeeded": len(texts) - failed,
+                "failed": failed,
+                "concurrency": max(1, BATCH_CONCURRENCY),
+                "elapsed_s": round(elapsed, 3),
+                "throughput_per_s": round(len(texts) / elapsed, 3) if elapsed else 0.0,
+                "latency_ms": {
+                    "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+                    "p50": round(percentile(latencies, 50) * 1000, 1),
+                    "p95": round(percentile(latencies, 95) * 1000, 1),
+                    "max": round(max(latencies, default=0.0) * 1000, 1),
+                },
             }
+        ) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-        analysis = ThreatAnalysis(
-            case_id=str(uuid.uuid4())[:8],
-            scenario=scenario.scenario,
-            threat_type=analysis_data.get("threat_type", "Unknown"),
-            severity=analysis_data.get("severity", "Medium"),
-            analysis=analysis_data.get("analysis", "Analysis unavailable"),
-            recommendations=analysis_data.get("recommendations", []),
-            context_sources=sources,
-            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            token_usage=token_count,
+@app.post("/api/analyze/stream")
+async def analyze_threat_stream(scenario: ThreatScenario):
+    # NDJSON: {"type": "token"} lines as Ollama generates, {"type": "field"} lines as
+    # each JSON field completes, then one {"type": "analysis"} line with the parsed
+    # ThreatAnalysis (or {"type": "error"}).
+    with stage("retrieval"):
+        context, sources, chunk_ids = await run_in_threadpool(retrieve_chunks, scenario.scenario)
+    # Streams always come from MODEL_NAME, so they use its cache entries, not the cascade's.
+    key = cache_key_for(scenario.scenario, chunk_ids, MODEL_NAME)
+    cached, vector = await lookup_cached(scenario.scenario, sources, key)
+    # Reject before the 200 goes out; later waits surface as an "error" event.
+    if cached is None and admission.is_full(scenario.priority):
+        lane = admission.lane(scenario.priority)
+        raise HTTPException(
+            status_code=429,
+            detail=f"'{lane.name}' queue is full",
+            headers={"Retry-After": str(admission.retry_after(lane))},
         )
 
-        return analysis
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    async def events():
+        parts = []
+        token_count = 0
+        json_text = None
+        try:
+            if cached is not None:
+                await record_case(cached)
+                yield json.dumps({"type": "analysis", "data": cached.model_dump()}) + "\n"
+                return
+
+            async with admission.slot(scenario.priority):
+                async for chunk in stream_ollama(scenario.scenario, context):
+                    token = chunk.get("response", "")
+                    if token:
+                        parts.append(token)
+                        yield json.dumps({"type": "token", "content": token}) + "\n"
+                    for name, value in chunk.get("fields", {}).items():
+                        yield json.dumps({"type": "field", "name": name, "value": value}) + "\n"
+                    if chunk.get("done"):
+                        token_count = chunk.get("eval_count", 0) + chunk.get("prompt_eval_count", 0)
+                        json_text = chunk.get("json")
+
+            response_text = "".join(parts)
+            response = json_text or extract_json(response_text) or response_text
+            analysis = build_analysis(scenario.scenario, response, sources, token_count)
+            await remember_analysis(key, vector, response, analysis)
+            await record_case(analysis)
+            yield json.dumps({"type": "analysis", "data": analysis.model_dump()}) + "\n"
+        except HTTPException as e:
+            yield json.dumps({"type": "error", "status": e.status_code, "detail": e.detail}) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def attachment(content: bytes, media_type: str, filename: str) -> Response:
+    return Response(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def stored_report(analysis: ThreatAnalysis) -> tuple[str, Path | None, bytes | None]:
+    # Returns (key, path, None) when already rendered, else renders and stores it.
+    key = report_key(analysis)
+    path = await run_in_threadpool(report_store.get, key)
+    if path is not None:
+        return key, path, None
+    pdf_bytes = await render_report([analysis])
+    path = await run_in_threadpool(report_store.put, key, pdf_bytes)
+    return key, path, pdf_bytes
+
+
+async def stored_case(case_id: str) -> ThreatAnalysis:
+    data = await run_in_threadpool(get_case_store().get, case_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    return ThreatAnalysis(**data)
 
 
 @app.post("/api/generate-report")
-async def generate_report(analysis: ThreatAnalysis):
+async def generate_report(
+    analysis: ThreatAnalysis | CaseReference, if_none_match: str | None = Header(default=None)
+):
+    # Accepts the full analysis, or just {"case_id": ...} for a stored case.
+    if isinstance(analysis, CaseReference):
+        analysis = await stored_case(analysis.case_id)
+    return await report_response(analysis, if_none_match)
+
+
+async def report_response(analysis: ThreatAnalysis, if_none_match: str | None) -> Response:
+    etag = f'"{report_key(analysis)}"'
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
     try:
-        pdf_path = generate_pdf_report(analysis)
-        return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=f"cybersentinel_report_{analysis.case_id}.pdf",
+        key, path, pdf_bytes = await stored_report(analysis)
+        filename = f"cybersentinel_report_{analysis.case_id}.pdf"
+        headers = {"ETag": etag, "Content-Location": f"/api/reports/{key}"}
+        if pdf_bytes is None:
+            return FileResponse(path, media_type="application/pdf", filename=filename, headers=headers)
+        response = attachment(pdf_bytes, "application/pdf", filename)
+        response.headers.update(headers)
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/cases", response_model=CasePage)
+async def list_cases(
+    q: str = "",
+    threat_type: str | None = None,
+    severity: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+):
+    # Newest first; pass next_cursor back as cursor for the following page.
+    # q is full-text over scenario and analysis; since/until compare timestamps.
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    items, next_cursor = await run_in_threadpool(
+        get_case_store().search,
+        q,
+        threat_type,
+        severity,
+        since,
+        until,
+        limit,
+        int(cursor) if cursor else None,
+    )
+    return {"items": items, "next_cursor": str(next_cursor) if next_cursor else None}
+
+
+@app.get("/api/cases/{case_id}", response_model=ThreatAnalysis)
+async def get_case(case_id: str):
+    return await stored_case(case_id)
+
+
+@app.get("/api/cases/{case_id}/report")
+async def get_case_report(case_id: str, if_none_match: str | None = Header(default=None)):
+    return await report_response(await stored_case(case_id), if_none_match)
+
+
+@app.get("/api/reports/{report_id}")
+async def get_report(report_id: str, if_none_match: str | None = Header(default=None)):
+    if len(report_id) != 64 or any(c not in "0123456789abcdef" for c in report_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+    etag = f'"{report_id}"'
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+    path = await run_in_threadpool(report_store.get, report_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"cybersentinel_report_{report_id[:8]}.pdf",
+        headers={"ETag": etag},
+    )
+
+
+@app.post("/api/generate-report/bulk")
+async def generate_report_bulk(request: BulkReportRequest):
+    if not request.analyses:
+        raise HTTPException(status_code=422, detail="No analyses to render")
+    if len(request.analyses) > REPORT_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {REPORT_BULK_MAX_ITEMS} analyses per bulk report"
         )
+    try:
+        content = await render_report(request.analyses, request.format)
+        if request.format == "zip":
+            return attachment(content, "application/zip", "cybersentinel_reports.zip")
+        return attachment(content, "application/pdf", "cybersentinel_reports.pdf")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def analyze_job(payload: dict) -> dict:
+    scenario_text = payload["scenario"]
+    context, sources, chunk_ids = await run_in_threadpool(retrieve_chunks, scenario_text)
+    analysis = await run_analysis(
+        scenario_text, context, sources, chunk_ids, lane=payload.get("priority", "bulk")
+    )
+    return {"analysis": analysis.model_dump()}
+
+
+async def report_job(payload: dict) -> dict:
+    analysis = ThreatAnalysis(**payload["analysis"])
+    # The store may evict the file later; the key lets the report be fetched or re-rendered.
+    key, _, _ = await stored_report(analysis)
+    return {"analysis": analysis.model_dump(), "report_key": key}
+
+
+async def analyze_report_job(payload: dict) -> dict:
+    return await report_job(await analyze_job(payload))
+
+
+async def ingest_job(payload: dict) -> dict:
+    return await run_in_threadpool(ingest_directory, payload["path"], force=payload["force"])
+
+
+job_queue.register("analyze", analyze_job)
+job_queue.register("report", report_job)
+job_queue.register("analyze_report", analyze_report_job)
+job_queue.register("ingest", ingest_job)
+
+
+def job_has_report(result: dict) -> bool:
+    # report_path: results stored by durable jobs before reports were keyed.
+    return bool(result.get("report_key") or result.get("report_path"))
+
+
+def job_view(job: dict) -> dict:
+    result = job["result"] or {}
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "analysis": result.get("analysis"),
+        "ingest": result if job["kind"] == "ingest" else None,
+        "report_url": f"/api/jobs/{job['id']}/report" if job_has_report(result) else None,
+        "error": job["error"],
+        "created": job["created"],
+        "updated": job["updated"],
+    }
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    if request.kind == "report":
+        if request.analysis is None:
+            raise HTTPException(status_code=422, detail="'report' jobs require an analysis")
+        payload = {"analysis": request.analysis.model_dump()}
+    else:
+        if not request.scenario:
+            raise HTTPException(status_code=422, detail=f"'{request.kind}' jobs require a scenario")
+        payload = {"scenario": request.scenario, "priority": request.priority}
+    return job_view(await job_queue.submit(request.kind, payload))
+
+
+@app.post("/api/ingest", status_code=202)
+async def ingest_documents(request: IngestRequest):
+    if not CHROMA_ENABLED:
+        raise HTTPException(status_code=503, detail="Vector DB is disabled (set ENABLE_CHROMA=1)")
+    root = Path(INGEST_ROOT).resolve()
+    target = (root / request.path).resolve()
+    if not target.is_relative_to(root) or not target.is_dir():
+        raise HTTPException(status_code=400, detail=f"Path must be a directory under {INGEST_ROOT}")
+    return job_view(await job_queue.submit("ingest", {"path": str(target), "force": request.force}))
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(job)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def watch_job(job_id: str):
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for job in job_queue.watch(job_id):
+            yield json.dumps(job_view(job)) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/jobs/{job_id}/report")
+async def get_job_report(job_id: str, if_none_match: str | None = Header(default=None)):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    result = job["result"] or {}
+    if not job_has_report(result):
+        raise HTTPException(status_code=409, detail=f"Job has no report (status: {job['status']})")
+    # Served from the report store, re-rendered if it has been evicted since the job ran.
+    return await report_response(ThreatAnalysis(**result["analysis"]), if_none_match)
+
+
+metrics.register(
+    metrics.Gauge(
+        "cybersentinel_admission_active",
+        "Generations currently running per lane.",
+        ("lane",),
+        lambda: {(name,): lane.active for name, lane in admission.lanes.items()},
+    )
+)
+metrics.register(
+    metrics.Gauge(
+        "cybersentinel_admission_queued",
+        "Requests waiting for a generation slot per lane.",
+        ("lane",),
+        lambda: {(name,): lane.queued() for name, lane in admission.lanes.items()},
+    )
+)
+metrics.register(
+    metrics.Gauge(
+        "cybersentinel_jobs_queued",
+        "Background jobs waiting for a worker.",
+        (),
+        lambda: {(): job_queue.queue_depth()},
+    )
+)
+metrics.register(
+    metrics.Gauge(
+        "cybersentinel_ollama_in_flight",
+        "Generations in flight per Ollama backend.",
+        ("backend",),
+        lambda: {(b.base_url,): b.in_flight for b in router.backends},
+    )
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/ready")
+async def readiness_check():
+    snapshot = warmup_state.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
 @app.get("/api/health")
 async def health_check():
+    # Served from in-memory state only; Ollama, Chroma and SQLite are polled by health_monitor.
     try:
-        ollama_status = "offline"
-        try:
-            resp = requests.get("http://localhost:11434/api/tags", timeout=5)
-            ollama_status = "online" if resp.status_code == 200 else "offline"
-        except Exception:
-            ollama_status = "offline"
-
-        vector_db_status, doc_count = vector_status()
+        if router.any_healthy():
+            ollama_status = "online"
+        else:
+            ollama_status = "unknown" if router.unchecked() else "offline"
+        vector_db = health_monitor.vector_db
 
         return {
             "status": "healthy" if ollama_status == "online" else "degraded",
             "ollama": ollama_status,
-            "vector_db": vector_db_status,
-            "documents_indexed": doc_count,
+            "ollama_backends": router.status(),
+            "vector_db": vector_db["status"],
+            "documents_indexed": vector_db["documents"],
+            "vector_db_check": {"last_check": vector_db["last_check"], "latency": vector_db["latency"]},
+            "lexical_index": lexical_index.stats(),
+            "analysis_cache": health_monitor.analysis_cache,
+            "semantic_cache": semantic_cache.stats(),
+            "embeddings": embedding_service.stats(),
+            "coalescing": generation_flights.stats(),
+            "admission": admission.stats(),
+            "jobs_queued": job_queue.queue_depth(),
+            "report_store": report_store.stats(),
+            "case_store": health_monitor.case_store,
+            "classifier": {"mode": CLASSIFIER_MODE, **threat_classifier.stats()},
+            "cascade": cascade_stats.snapshot(),
+            "monitor": health_monitor.snapshot(),
         }
     except Exception as e:
         return {"status": "degraded", "error": str(e)}
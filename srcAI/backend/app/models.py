@@ -1,8 +1,25 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 
+Priority = Literal["high", "normal", "bulk"]
+
+
 class ThreatScenario(BaseModel):
     scenario: str
+    priority: Priority = "normal"
+
+
+class PreClassification(BaseModel):
+    threat_type: str
+    severity: str
+    confidence: float
+    threat_type_confidence: float
+    severity_confidence: float
+    indicators: dict[str, list[str]] = {}
+    keywords: list[str] = []
+    latency_ms: float
 
 
 class ThreatAnalysis(BaseModel):
@@ -15,3 +32,34 @@ class ThreatAnalysis(BaseModel):
     context_sources: list[str]
     timestamp: str
     token_usage: int
+    model: str | None = None
+    cache_hit: bool = False
+    fast_path: bool = False
+    pre_classification: PreClassification | None = None
+    enrichment_job_id: str | None = None
+
+
+class CaseReference(BaseModel):
+    case_id: str
+
+
+class CasePage(BaseModel):
+    items: list[ThreatAnalysis]
+    next_cursor: str | None = None
+
+
+class BulkReportRequest(BaseModel):
+    analyses: list[ThreatAnalysis]
+    format: Literal["pdf", "zip"] = "pdf"
+
+
+class IngestRequest(BaseModel):
+    path: str = "."
+    force: bool = False
+
+
+class JobRequest(BaseModel):
+    kind: Literal["analyze", "report", "analyze_report"] = "analyze"
+    scenario: str | None = None
+    priority: Priority = "bulk"
+    analysis: ThreatAnalysis | None = None
@@ -0,0 +1,151 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from ..config import ADMISSION_CAPACITY, ADMISSION_LANES, ADMISSION_MAX_WAIT
+
+
+class Lane:
+    def __init__(self, name: str, limit: int, queue_limit: int):
+        self.name = name
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_times: deque[float] = deque(maxlen=512)
+
+    def queued(self) -> int:
+        return sum(1 for w in self.waiters if not w.done())
+
+    def stats(self) -> dict:
+        waits = sorted(self.wait_times)
+        return {
+            "active": self.active,
+            "limit": self.limit,
+            "queued": self.queued(),
+            "queue_limit": self.queue_limit,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+        }
+
+
+class AdmissionController:
+    # At most `capacity` generations run at once across all lanes, and each lane
+    # is further capped by its own quota. Freed slots go to the highest-priority
+    # lane (declaration order) with waiters. Full queues are rejected with 429;
+    # requests that wait longer than max_wait get 503. Both carry Retry-After.
+
+    def __init__(self, capacity: int, lanes: list[tuple[str, int, int]], max_wait: float):
+        self.capacity = max(1, capacity)
+        self.max_wait = max_wait
+        self.lanes = {name: Lane(name, limit, queue_limit) for name, limit, queue_limit in lanes}
+        self.active = 0
+        self._service_time = 10.0
+
+    def lane(self, name: str) -> Lane:
+        # Unknown lane names fall back to the lowest-priority lane.
+        return self.lanes.get(name) or list(self.lanes.values())[-1]
+
+    def is_full(self, lane_name: str) -> bool:
+        lane = self.lane(lane_name)
+        return not self._can_start(lane) and lane.queued() >= lane.queue_limit
+
+    def retry_after(self, lane: Lane) -> int:
+        backlog = lane.queued() + 1
+        return max(1, min(60, math.ceil(backlog / max(1, lane.limit) * self._service_time)))
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str):
+        lane = self.lane(lane_name)
+        started = time.perf_counter()
+        if self._can_start(lane) and not self._has_waiters(upto=lane):
+            self._grant(lane)
+        else:
+            if lane.queued() >= lane.queue_limit:
+                lane.rejected += 1
+                raise self._reject(429, f"'{lane.name}' queue is full", lane)
+            waiter = asyncio.get_running_loop().create_future()
+            lane.waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, self.max_wait)
+            except asyncio.TimeoutError:
+                lane.timed_out += 1
+                raise self._reject(503, f"Timed out waiting for a '{lane.name}' slot", lane)
+            except asyncio.CancelledError:
+                # Cancelled right after being granted a slot: hand it on.
+                if waiter.done() and not waiter.cancelled():
+                    self._release(lane)
+                raise
+            finally:
+                if waiter in lane.waiters:
+                    lane.waiters.remove(waiter)
+        lane.wait_times.append(time.perf_counter() - started)
+
+        service_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - service_started
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+            self._release(lane)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
+
+    def _can_start(self, lane: Lane) -> bool:
+        return self.active < self.capacity and lane.active < lane.limit
+
+    def _has_waiters(self, upto: Lane) -> bool:
+        # Waiters that could take a freed slot ahead of a new request in `upto`.
+        for lane in self.lanes.values():
+            if lane.queued() and lane.active < lane.limit:
+                return True
+            if lane is upto:
+                return False
+        return False
+
+    def _grant(self, lane: Lane) -> None:
+        lane.active += 1
+        lane.admitted += 1
+        self.active += 1
+
+    def _release(self, lane: Lane) -> None:
+        lane.active -= 1
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.active < self.capacity:
+            for lane in self.lanes.values():
+                while lane.waiters and lane.waiters[0].done():
+                    lane.waiters.popleft()
+                if lane.waiters and lane.active < lane.limit:
+                    self._grant(lane)
+                    lane.waiters.popleft().set_result(None)
+                    break
+            else:
+                return
+
+    def _reject(self, status_code: int, detail: str, lane: Lane) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after(lane))},
+        )
+
+
+admission = AdmissionController(ADMISSION_CAPACITY, ADMISSION_LANES, ADMISSION_MAX_WAIT)
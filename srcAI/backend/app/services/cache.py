@@ -0,0 +1,164 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import (
+    ANALYSIS_CACHE_DB,
+    ANALYSIS_CACHE_DISK_SIZE,
+    ANALYSIS_CACHE_SIZE,
+    ANALYSIS_CACHE_TTL,
+)
+
+
+def normalize_scenario(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def analysis_cache_key(scenario: str, chunk_ids: list[str], model: str, options: dict) -> str:
+    payload = json.dumps(
+        {
+            "scenario": normalize_scenario(scenario),
+            "chunks": list(chunk_ids),
+            "model": model,
+            "options": options,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    # In-memory LRU in front of an optional SQLite tier. Values are JSON-able dicts.
+
+    def __init__(self, max_entries: int, ttl: float, db_path: str = "", max_disk_entries: int = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "created REAL NOT NULL, accessed REAL NOT NULL)"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS analysis_cache_accessed ON analysis_cache(accessed)"
+                )
+                self._db.commit()
+            except sqlite3.Error as db_err:
+                print(f"Analysis cache DB init failed: {db_err}")
+                self._db = None
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            value = self._disk_get(key, now)
+            if value is not None:
+                self._memory_set(key, value, now)
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._memory_set(key, value, now)
+            self._disk_set(key, value, now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count(),
+            }
+
+    def _memory_set(self, key: str, value: dict, now: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (now, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> dict | None:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, created FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] >= self.ttl:
+                self._db.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE analysis_cache SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"Analysis cache read error: {e}")
+            return None
+
+    def _disk_set(self, key: str, value: dict, now: float) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._db.execute("DELETE FROM analysis_cache WHERE created <= ?", (now - self.ttl,))
+            if self.max_disk_entries > 0:
+                self._db.execute(
+                    "DELETE FROM analysis_cache WHERE key IN ("
+                    "SELECT key FROM analysis_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Analysis cache write error: {e}")
+
+    def _disk_count(self) -> int:
+        if self._db is None:
+            return 0
+        try:
+            return self._db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+analysis_cache = AnalysisCache(
+    max_entries=ANALYSIS_CACHE_SIZE,
+    ttl=ANALYSIS_CACHE_TTL,
+    db_path=ANALYSIS_CACHE_DB,
+    max_disk_entries=ANALYSIS_CACHE_DISK_SIZE,
+)
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+
+from ..config import (
+    CASCADE_ENABLED,
+    CASCADE_ESCALATE_SEVERITIES,
+    CASCADE_MIN_CONFIDENCE,
+    CASCADE_SELF_CONSISTENCY,
+    CASCADE_SMALL_MODEL,
+    MODEL_NAME,
+)
+from .admission import admission
+from .metrics import RollingLatency, cascade_escalations_total, cascade_requests_total, cascade_tier_seconds
+from .ollama_client import ANALYSIS_SCHEMA, query_ollama
+
+
+# Identifies what produced an answer in cache keys: cascade results must not be
+# served as large-model results or the other way round.
+SERVING_MODEL = f"{CASCADE_SMALL_MODEL}>{MODEL_NAME}" if CASCADE_ENABLED else MODEL_NAME
+SEVERITIES = ANALYSIS_SCHEMA["properties"]["severity"]["enum"]
+
+
+def load_analysis(response: str) -> dict | None:
+    # The model's JSON if it satisfies the analysis schema, else None.
+    try:
+        data = json.loads(response)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    for field in ("threat_type", "severity", "analysis"):
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            return None
+    recommendations = data.get("recommendations")
+    if not isinstance(recommendations, list) or not recommendations:
+        return None
+    if not all(isinstance(text, str) for text in recommendations) or data["severity"] not in SEVERITIES:
+        return None
+    return data
+
+
+def label(data: dict) -> tuple[str, str]:
+    return data["threat_type"].strip().lower(), data["severity"]
+
+
+def escalation_reason(data: dict | None, hint: dict | None = None) -> str | None:
+    # Why a small-model answer should go to the large model, or None to keep it.
+    if data is None:
+        return "invalid"
+    if data["severity"] in CASCADE_ESCALATE_SEVERITIES:
+        return "severity"
+    confident = hint is not None and hint["confidence"] >= CASCADE_MIN_CONFIDENCE
+    if confident and hint["threat_type"].lower() != label(data)[0]:
+        return "classifier_disagrees"
+    return None
+
+
+def confirmed(data: dict, hint: dict | None) -> bool:
+    # A confident pre-classification with the same label; only answers without one
+    # are borderline enough to spend self-consistency samples on.
+    return (
+        hint is not None
+        and hint["confidence"] >= CASCADE_MIN_CONFIDENCE
+        and (hint["threat_type"].lower(), hint["severity"]) == label(data)
+    )
+
+
+def consistent(data: dict, samples: list[str | None]) -> bool:
+    for sample in samples:
+        other = load_analysis(sample) if sample is not None else None
+        if other is None or label(other) != label(data):
+            return False
+    return True
+
+
+class CascadeStats:
+    # Routing counts and latency per tier for /api/health, to tune the escalation
+    # rules; the same numbers go to /metrics.
+
+    def __init__(self):
+        self.requests = Counter()
+        self.errors = Counter()
+        self.escalations = Counter()
+        self.latency = {"small": RollingLatency(200), "large": RollingLatency(200)}
+
+    def record(self, tier: str, seconds: float, result: str) -> None:
+        self.requests[tier] += 1
+        if result == "error":
+            self.errors[tier] += 1
+        self.latency[tier].observe(seconds)
+        cascade_requests_total.inc(tier=tier, result=result)
+        cascade_tier_seconds.observe(seconds, tier=tier)
+
+    def escalate(self, reason: str) -> None:
+        self.escalations[reason] += 1
+        cascade_escalations_total.inc(reason=reason)
+
+    def snapshot(self) -> dict:
+        small = self.requests["small"]
+        escalated = sum(self.escalations.values())
+        return {
+            "enabled": CASCADE_ENABLED,
+            "small_model": CASCADE_SMALL_MODEL,
+            "large_model": MODEL_NAME,
+            "requests": dict(self.requests),
+            "errors": dict(self.errors),
+            "escalations": dict(self.escalations),
+            "escalation_rate": round(escalated / small, 3) if small else None,
+            "latency": {tier: latency.summary() for tier, latency in self.latency.items()},
+        }
+
+
+cascade_stats = CascadeStats()
+
+
+async def small_generation(prompt: str, context: str, lane: str) -> tuple[str, int] | None:
+    # None when the small model fails; admission rejections still propagate.
+    async with admission.slot(lane):
+        try:
+            return await query_ollama(prompt, context, CASCADE_SMALL_MODEL)
+        except HTTPException:
+            return None
+
+
+async def query_cascade(
+    prompt: str, context: str = "", hint: dict | None = None, lane: str = "normal"
+) -> tuple[str, int, str]:
+    # Returns (response, tokens over all tiers, model that answered). Every generation
+    # (first answer, each self-consistency sample, the escalation) takes its own
+    # admission slot, so ADMISSION_CAPACITY still bounds what runs on Ollama.
+    started = time.perf_counter()
+    first = await small_generation(prompt, context, lane)
+    if first is None:
+        # A missing or failing small model still gets an answer from the large one.
+        tokens, reason = 0, "error"
+        cascade_stats.record("small", time.perf_counter() - started, "error")
+    else:
+        response, tokens = first
+        data = load_analysis(response)
+        reason = escalation_reason(data, hint)
+        if reason is None and CASCADE_SELF_CONSISTENCY > 0 and not confirmed(data, hint):
+            samples = await asyncio.gather(
+                *(small_generation(prompt, context, lane) for _ in range(CASCADE_SELF_CONSISTENCY))
+            )
+            tokens += sum(sample[1] for sample in samples if sample is not None)
+            if not consistent(data, [sample[0] if sample is not None else None for sample in samples]):
+                reason = "inconsistent"
+        cascade_stats.record("small", time.perf_counter() - started, "escalated" if reason else "accepted")
+    if reason is None:
+        return response, tokens, CASCADE_SMALL_MODEL
+
+    cascade_stats.escalate(reason)
+    started = time.perf_counter()
+    async with admission.slot(lane):
+        try:
+            response, large_tokens = await query_ollama(prompt, context)
+        except HTTPException:
+            cascade_stats.record("large", time.perf_counter() - started, "error")
+            raise
+    cascade_stats.record("large", time.perf_counter() - started, "accepted")
+    return response, tokens + large_tokens, MODEL_NAME
@@ -0,0 +1,141 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from ..config import CASE_STORE_DB
+
+
+class CaseStore:
+    # Every analysis handed to a client, keyed by case_id. Listing is newest first
+    # with the row id as cursor, so pages stay stable while new cases arrive.
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cases ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, case_id TEXT NOT NULL UNIQUE, "
+            "timestamp TEXT NOT NULL, threat_type TEXT NOT NULL, severity TEXT NOT NULL, "
+            "scenario TEXT NOT NULL, analysis TEXT NOT NULL, data TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cases_timestamp ON cases(timestamp)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS cases_threat_type ON cases(threat_type)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS cases_severity ON cases(severity)")
+        self.fts = self._create_fts()
+        self._db.commit()
+
+    def _create_fts(self) -> bool:
+        # External-content FTS5 index kept in sync by triggers; falls back to LIKE
+        # scans when this SQLite build has no FTS5.
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5("
+                "scenario, analysis, content='cases', content_rowid='id')"
+            )
+        except sqlite3.OperationalError as fts_err:
+            print(f"Case search without FTS5: {fts_err}")
+            return False
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS cases_ai AFTER INSERT ON cases BEGIN "
+            "INSERT INTO cases_fts(rowid, scenario, analysis) "
+            "VALUES (new.id, new.scenario, new.analysis); END"
+        )
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS cases_ad AFTER DELETE ON cases BEGIN "
+            "INSERT INTO cases_fts(cases_fts, rowid, scenario, analysis) "
+            "VALUES ('delete', old.id, old.scenario, old.analysis); END"
+        )
+        return True
+
+    def add(self, analysis: dict) -> bool:
+        # False when the case_id is already taken.
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT INTO cases (case_id, timestamp, threat_type, severity, scenario, "
+                    "analysis, data, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        analysis["case_id"],
+                        analysis["timestamp"],
+                        analysis["threat_type"],
+                        analysis["severity"],
+                        analysis["scenario"],
+                        analysis["analysis"],
+                        json.dumps(analysis),
+                        time.time(),
+                    ),
+                )
+                self._db.commit()
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def get(self, case_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(
+        self,
+        query: str = "",
+        threat_type: str | None = None,
+        severity: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 20,
+        cursor: int | None = None,
+    ) -> tuple[list[dict], int | None]:
+        # Returns (cases, next_cursor); next_cursor is None on the last page.
+        clauses, params = [], []
+        terms = re.findall(r"\w+", query)
+        if terms and self.fts:
+            clauses.append("id IN (SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?)")
+            params.append(" ".join(f'"{term}"*' for term in terms))
+        elif terms:
+            for term in terms:
+                clauses.append("(scenario LIKE ? OR analysis LIKE ?)")
+                params.extend([f"%{term}%"] * 2)
+        for column, value in (("threat_type", threat_type), ("severity", severity)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, data FROM cases {where} ORDER BY id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [json.loads(row[1]) for row in rows[:limit]], next_cursor
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+        return {"cases": count, "full_text_search": self.fts}
+
+
+case_store: CaseStore | None = None
+_open_lock = threading.Lock()
+
+
+def get_case_store() -> CaseStore:
+    # Opened by the app lifespan (or first use) rather than at import, so CLIs and
+    # benchmarks importing the app do not create the database in the cwd.
+    global case_store
+    with _open_lock:
+        if case_store is None:
+            case_store = CaseStore(CASE_STORE_DB)
+        return case_store
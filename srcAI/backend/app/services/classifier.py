@@ -0,0 +1,213 @@
+import pickle
+import re
+import time
+from collections import Counter
+
+from ..config import CLASSIFIER_MIN_EXAMPLES, CLASSIFIER_MODEL
+
+
+SEVERITIES = ("Low", "Medium", "High")
+IOC_PATTERNS = {
+    "cve": re.compile(r"\bCVE-\d{4}-\d{4,7}\b", re.IGNORECASE),
+    "url": re.compile(r"\bhttps?://[^\s\"'<>]+", re.IGNORECASE),
+    "email": re.compile(r"\b[\w.+-]+@(?:[a-z0-9-]+\.)+[a-z]{2,}\b", re.IGNORECASE),
+    "ipv4": re.compile(r"\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b"),
+    "sha256": re.compile(r"\b[a-f0-9]{64}\b", re.IGNORECASE),
+    "sha1": re.compile(r"\b[a-f0-9]{40}\b", re.IGNORECASE),
+    "md5": re.compile(r"\b[a-f0-9]{32}\b", re.IGNORECASE),
+    "attack_technique": re.compile(r"\bT1\d{3}(?:\.\d{3})?\b"),
+    "domain": re.compile(r"\b(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,}\b", re.IGNORECASE),
+}
+# Dotted names that are files, not domains.
+FILE_SUFFIXES = frozenset(
+    "exe dll sys bat cmd ps1 vbs js jar msi scr lnk hta doc docx docm xls xlsx xlsm ppt pptx "
+    "pdf rtf zip rar 7z iso img txt log csv json xml py sh elf bin dat tmp".split()
+)
+KEYWORDS = {
+    "ransomware": r"ransom\w*|encrypt\w* (?:files|data|shares)|lockbit|blackcat|conti|ryuk|\.locked",
+    "phishing": r"phish\w*|spear-?phishing|credential harvest\w*|fake login|malicious (?:link|attachment)|invoice lure",
+    "malware": r"malware|trojan|loader|dropper|backdoor|rat\b|emotet|trickbot|qakbot|cobalt ?strike|beacon\w*",
+    "credential_attack": r"brute[- ]?forc\w*|password spray\w*|credential stuffing|failed logins?|mfa fatigue",
+    "ddos": r"\bddos\b|denial[- ]of[- ]service|syn flood|traffic spike|botnet",
+    "web_attack": r"sql injection|\bsqli\b|\bxss\b|cross-site|path traversal|remote code execution|\brce\b|web ?shell",
+    "exfiltration": r"exfiltrat\w*|data (?:theft|leak\w*)|large (?:upload|transfer)s?|dns tunnel\w*",
+    "insider": r"insider|disgruntled|former employee|privilege misuse|unauthori[sz]ed access",
+    "lateral_movement": r"lateral movement|psexec|pass[- ]the[- ](?:hash|ticket)|mimikatz|\brdp\b|smb",
+    "vulnerability": r"\bcve-|unpatched|zero[- ]day|exploit\w*|vulnerab\w*",
+}
+KEYWORD_PATTERNS = {name: re.compile(rf"(?:{pattern})", re.IGNORECASE) for name, pattern in KEYWORDS.items()}
+
+
+def extract_iocs(text: str) -> dict[str, list[str]]:
+    # Indicators by type, de-duplicated in order of appearance. A hash or URL is not
+    # also reported as a shorter hash or a domain.
+    found: dict[str, list[str]] = {}
+    claimed: list[tuple[int, int]] = []
+    for kind, pattern in IOC_PATTERNS.items():
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if any(start >= s and end <= e for s, e in claimed):
+                continue
+            value = match.group(0).rstrip(".,;:)")
+            if kind == "domain" and value.rsplit(".", 1)[-1].lower() in FILE_SUFFIXES:
+                continue
+            claimed.append((start, end))
+            values = found.setdefault(kind, [])
+            if value not in values:
+                values.append(value)
+    return found
+
+
+def extract_keywords(text: str) -> list[str]:
+    return [name for name, pattern in KEYWORD_PATTERNS.items() if pattern.search(text)]
+
+
+def featurize(text: str, iocs: dict | None = None, keywords: list[str] | None = None) -> str:
+    # The scenario plus one synthetic token per indicator type and keyword family, so
+    # the linear model can weigh "has a CVE" or "mentions ransom notes" directly.
+    iocs = extract_iocs(text) if iocs is None else iocs
+    keywords = extract_keywords(text) if keywords is None else keywords
+    markers = [f"ioc_{kind}" for kind in iocs] + [f"kw_{name}" for name in keywords]
+    return " ".join([text, *markers])
+
+
+def normalize_severity(value: str) -> str | None:
+    value = (value or "").strip().capitalize()
+    return value if value in SEVERITIES else None
+
+
+def training_examples(analyses) -> list[dict]:
+    # LLM-produced analyses only: fast-path answers would teach the model its own
+    # output, and "Unknown" marks a fallback parse. Threat types are grouped
+    # case-insensitively under their most common spelling.
+    rows = []
+    for analysis in analyses:
+        severity = normalize_severity(analysis.get("severity", ""))
+        threat_type = " ".join((analysis.get("threat_type") or "").split())
+        if analysis.get("fast_path") or not severity or not threat_type or threat_type.lower() == "unknown":
+            continue
+        rows.append({**analysis, "threat_type": threat_type, "severity": severity})
+    spellings: dict[str, Counter] = {}
+    for row in rows:
+        spellings.setdefault(row["threat_type"].lower(), Counter())[row["threat_type"]] += 1
+    canonical = {key: counts.most_common(1)[0][0] for key, counts in spellings.items()}
+    for row in rows:
+        row["threat_type"] = canonical[row["threat_type"].lower()]
+    return rows
+
+
+class ThreatClassifier:
+    # TF-IDF features with one logistic-regression model per field, trained from
+    # past analyses (train_classifier.py). Confidence is the predicted class
+    # probability; the overall confidence is the lower of the two fields.
+
+    def __init__(self, path: str = CLASSIFIER_MODEL):
+        self.path = path
+        self.model: dict | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def load(self) -> bool:
+        # The model file is a pickle: only load files this deployment trained itself.
+        try:
+            with open(self.path, "rb") as f:
+                model = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        self.model = model
+        return True
+
+    def save(self, path: str | None = None) -> None:
+        with open(path or self.path, "wb") as f:
+            pickle.dump(self.model, f)
+
+    def train(self, analyses, min_examples: int = CLASSIFIER_MIN_EXAMPLES) -> dict:
+        # scikit-learn is only needed to train; a saved model unpickles with it too.
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        rows = training_examples(analyses)
+        counts = Counter(row["threat_type"] for row in rows)
+        rows = [row for row in rows if counts[row["threat_type"]] >= min_examples]
+        if len({row["threat_type"] for row in rows}) < 2:
+            raise ValueError(
+                f"Need at least two threat types with {min_examples}+ analyses each "
+                f"(have {len(rows)} usable analyses)"
+            )
+        texts = [featurize(row["scenario"]) for row in rows]
+        vectorizer = TfidfVectorizer(sublinear_tf=True, ngram_range=(1, 2), min_df=2, max_features=50000)
+        features = vectorizer.fit_transform(texts)
+        models = {}
+        for field in ("threat_type", "severity"):
+            labels = [row[field] for row in rows]
+            if len(set(labels)) < 2:
+                models[field] = labels[0]
+                continue
+            model = LogisticRegression(C=4.0, max_iter=1000, class_weight="balanced")
+            models[field] = model.fit(features, labels)
+
+        recommendations = {}
+        for threat_type in {row["threat_type"] for row in rows}:
+            advice = Counter(
+                text for row in rows if row["threat_type"] == threat_type for text in row.get("recommendations", [])
+            )
+            recommendations[threat_type] = [text for text, _ in advice.most_common(5)]
+        self.model = {
+            "version": 1,
+            "vectorizer": vectorizer,
+            **models,
+            "recommendations": recommendations,
+            "examples": len(rows),
+            "classes": sorted({row["threat_type"] for row in rows}),
+            "trained_at": time.time(),
+        }
+        return {
+            "examples": len(rows),
+            "threat_types": dict(Counter(row["threat_type"] for row in rows)),
+            "features": len(vectorizer.vocabulary_),
+        }
+
+    def predict(self, text: str) -> dict | None:
+        model = self.model
+        if model is None:
+            return None
+        started = time.perf_counter()
+        iocs = extract_iocs(text)
+        keywords = extract_keywords(text)
+        features = model["vectorizer"].transform([featurize(text, iocs, keywords)])
+        prediction = {}
+        for field in ("threat_type", "severity"):
+            estimator = model[field]
+            if isinstance(estimator, str):
+                prediction[field], prediction[f"{field}_confidence"] = estimator, 1.0
+                continue
+            probabilities = estimator.predict_proba(features)[0]
+            best = int(probabilities.argmax())
+            prediction[field] = str(estimator.classes_[best])
+            prediction[f"{field}_confidence"] = round(float(probabilities[best]), 4)
+        prediction["confidence"] = min(prediction["threat_type_confidence"], prediction["severity_confidence"])
+        prediction["indicators"] = iocs
+        prediction["keywords"] = keywords
+        prediction["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return prediction
+
+    def recommendations(self, threat_type: str) -> list[str]:
+        model = self.model
+        return list(model["recommendations"].get(threat_type, [])) if model else []
+
+    def stats(self) -> dict:
+        model = self.model
+        if model is None:
+            return {"ready": False, "path": self.path}
+        return {
+            "ready": True,
+            "path": self.path,
+            "examples": model["examples"],
+            "classes": len(model["classes"]),
+            "trained_at": model["trained_at"],
+        }
+
+
+threat_classifier = ThreatClassifier()
@@ -0,0 +1,192 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from ..config import (
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_MAX_BATCH,
+    EMBEDDING_MAX_WAIT_MS,
+    EMBEDDING_PROCESSES,
+    EMBEDDING_WORKERS,
+)
+
+
+_embedding_fn = None
+_embedding_failed = False
+
+
+def get_embedding_fn():
+    global _embedding_fn, _embedding_failed
+    if _embedding_fn is None and not _embedding_failed:
+        try:
+            from chromadb.utils import embedding_functions
+
+            _embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+        except BaseException as embed_err:
+            print(f"Embedding init failed (likely offline): {embed_err}")
+            _embedding_failed = True
+    return _embedding_fn
+
+
+def _init_worker() -> None:
+    get_embedding_fn()
+
+
+def _forward(texts: list[str]) -> list[np.ndarray]:
+    # One model forward pass; runs in the service's thread or process pool.
+    fn = get_embedding_fn()
+    if fn is None:
+        raise RuntimeError("Embedding model unavailable")
+    return [np.asarray(vector, dtype=np.float32) for vector in fn(texts)]
+
+
+class _Inline(Executor):
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class EmbeddingService:
+    # Query embeddings go through an LRU keyed by text hash; misses from
+    # concurrent callers are gathered for up to max_wait_ms and embedded together.
+
+    def __init__(
+        self,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+        max_batch: int = EMBEDDING_MAX_BATCH,
+        max_wait_ms: float = EMBEDDING_MAX_WAIT_MS,
+        workers: int = EMBEDDING_WORKERS,
+        use_processes: bool = EMBEDDING_PROCESSES,
+    ):
+        self.cache_size = cache_size
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.use_processes = use_processes
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: list[tuple[list[str], Future]] = []
+        self._cond = threading.Condition()
+        self._batcher: threading.Thread | None = None
+        self._executor: Executor | None = None
+
+    def submit(self, texts: list[str]) -> Future:
+        # Raw forward pass on the pool, bypassing cache and micro-batching (bulk ingestion).
+        return self._get_executor().submit(_forward, texts)
+
+    def embed(self, texts: list[str]) -> list[np.ndarray] | None:
+        results: list[np.ndarray | None] = [None] * len(texts)
+        missing: dict[str, list[int]] = {}
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                vector = self._cache.get(self._key(text))
+                if vector is not None:
+                    self._cache.move_to_end(self._key(text))
+                    results[i] = vector
+                    self.hits += 1
+                else:
+                    missing.setdefault(text, []).append(i)
+                    self.misses += 1
+
+        if missing:
+            future: Future = Future()
+            with self._cond:
+                self._queue.append((list(missing), future))
+                self._ensure_batcher()
+                self._cond.notify()
+            try:
+                vectors = future.result()
+            except Exception as e:
+                print(f"Embedding error: {e}")
+                return None
+            with self._cache_lock:
+                for text, vector in zip(missing, vectors):
+                    for i in missing[text]:
+                        results[i] = vector
+                    if self.cache_size > 0:
+                        self._cache[self._key(text)] = vector
+                        self._cache.move_to_end(self._key(text))
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            return {
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "cache_entries": len(self._cache),
+                "batches": self.batches,
+                "avg_batch_size": round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+            }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers <= 0:
+                self._executor = _Inline()
+            elif self.use_processes:
+                self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="embed")
+        return self._executor
+
+    def _ensure_batcher(self) -> None:
+        if self._batcher is None or not self._batcher.is_alive():
+            self._batcher = threading.Thread(target=self._run_batcher, name="embed-batcher", daemon=True)
+            self._batcher.start()
+
+    def _run_batcher(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.max_wait
+                while sum(len(texts) for texts, _ in self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = [self._queue.pop(0)]
+                size = len(batch[0][0])
+                while self._queue and size + len(self._queue[0][0]) <= self.max_batch:
+                    size += len(self._queue[0][0])
+                    batch.append(self._queue.pop(0))
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            self.batches += 1
+            self.batched_texts += len(texts)
+            try:
+                vectors = self.submit(texts).result()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(vectors[offset : offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+embedding_service = EmbeddingService()
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import OLLAMA_HEALTH_INTERVAL
+from .cache import analysis_cache
+from .cases import get_case_store
+from .metrics import RollingLatency
+from .ollama_client import router
+from .rag import vector_status
+
+
+class HealthMonitor:
+    # Polls the Ollama backends (/api/tags, /api/ps), the vector store, the case
+    # store and the analysis cache (its SQLite tier counts rows) on an interval.
+    # /api/health only reads the last snapshot, so load balancer probes never wait
+    # on a slow dependency. Each poll replaces the snapshot dicts whole, so readers
+    # always see one consistent poll.
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.checked_at: float | None = None
+        self.poll_ms: float | None = None
+        self.polls = 0
+        self.last_error: str | None = None
+        self.vector_db: dict = {"status": "starting", "documents": 0, "last_check": None, "latency": None}
+        self.case_store: dict = {"last_check": None, "latency": None}
+        self.analysis_cache: dict = {"last_check": None}
+        self._latency = {name: RollingLatency() for name in ("vector_db", "case_store", "analysis_cache")}
+        self._task: asyncio.Task | None = None
+
+    async def _timed(self, name: str, fn):
+        started = time.perf_counter()
+        result = await run_in_threadpool(fn)
+        self._latency[name].observe(time.perf_counter() - started)
+        return result
+
+    async def _poll_vector_db(self) -> None:
+        try:
+            status, count = await self._timed("vector_db", vector_status)
+        except Exception as e:
+            status, count = "degraded", 0
+            self.last_error = str(e) or type(e).__name__
+        self.vector_db = {
+            "status": status,
+            "documents": count,
+            "last_check": time.time(),
+            "latency": self._latency["vector_db"].summary(),
+        }
+
+    async def _poll_case_store(self) -> None:
+        try:
+            stats = await self._timed("case_store", lambda: get_case_store().stats())
+        except Exception as e:
+            stats = {"error": str(e) or type(e).__name__}
+        self.case_store = {**stats, "last_check": time.time(), "latency": self._latency["case_store"].summary()}
+
+    async def _poll_analysis_cache(self) -> None:
+        try:
+            stats = await self._timed("analysis_cache", analysis_cache.stats)
+        except Exception as e:
+            stats = {"error": str(e) or type(e).__name__}
+        self.analysis_cache = {**stats, "last_check": time.time()}
+
+    async def poll(self) -> None:
+        started = time.perf_counter()
+        await asyncio.gather(
+            router.check_health(), self._poll_vector_db(), self._poll_case_store(), self._poll_analysis_cache()
+        )
+        self.poll_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.checked_at = time.time()
+        self.polls += 1
+
+    async def start(self) -> None:
+        async def loop():
+            while True:
+                try:
+                    await self.poll()
+                except Exception as e:
+                    self.last_error = str(e) or type(e).__name__
+                    print(f"Health poll failed: {e}")
+                await asyncio.sleep(self.interval)
+
+        self._task = asyncio.create_task(loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "interval": self.interval,
+            "polls": self.polls,
+            "checked_at": self.checked_at,
+            "age_s": round(time.time() - self.checked_at, 3) if self.checked_at else None,
+            "poll_ms": self.poll_ms,
+            "last_error": self.last_error,
+        }
+
+
+health_monitor = HealthMonitor(OLLAMA_HEALTH_INTERVAL)
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Iterator
+
+from ..config import (
+    INGEST_BATCH_SIZE,
+    INGEST_CHUNK_OVERLAP,
+    INGEST_CHUNK_SIZE,
+    INGEST_MANIFEST,
+    INGEST_WORKERS,
+)
+from . import rag
+from .embeddings import EmbeddingService
+from .lexical import lexical_index
+from .vector_store import LocalVectorStore
+
+
+SUPPORTED_SUFFIXES = {".txt", ".md", ".markdown", ".pdf"}
+
+
+def iter_documents(directory: Path) -> Iterator[Path]:
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            path = Path(root) / name
+            if path.suffix.lower() in SUPPORTED_SUFFIXES:
+                yield path
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_document(path: Path) -> str:
+    if path.suffix.lower() == ".pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            print(f"Skipping {path}: install pypdf to ingest PDFs")
+            return ""
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+def check_chunking(size: int, overlap: int) -> None:
+    # Windows may end as early as halfway, so a larger overlap would make the next
+    # window start barely past the last one and produce near-identical chunks.
+    if size <= 0 or not 0 <= overlap <= size // 2:
+        raise ValueError(
+            f"Chunk overlap must be between 0 and half the chunk size (size {size}, overlap {overlap})"
+        )
+
+
+def chunk_text(text: str, size: int = INGEST_CHUNK_SIZE, overlap: int = INGEST_CHUNK_OVERLAP) -> list[str]:
+    # Fixed-size windows that prefer to end on a paragraph or word boundary.
+    check_chunking(size, overlap)
+    text = text.strip()
+    if not text:
+        return []
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            boundary = text.rfind("\n\n", start + size // 2, end)
+            if boundary == -1:
+                boundary = text.rfind(" ", start + size // 2, end)
+            if boundary != -1:
+                end = boundary
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def chunk_ids(rel_path: str, count: int) -> list[str]:
+    prefix = hashlib.sha1(rel_path.encode("utf-8")).hexdigest()[:16]
+    return [f"{prefix}-{i}" for i in range(count)]
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def ingest_directory(
+    directory: str,
+    collection=None,
+    workers: int = INGEST_WORKERS,
+    batch_size: int = INGEST_BATCH_SIZE,
+    force: bool = False,
+    manifest_path: str = INGEST_MANIFEST,
+    use_processes: bool = False,
+) -> dict:
+    check_chunking(INGEST_CHUNK_SIZE, INGEST_CHUNK_OVERLAP)
+    collection = collection or rag.open_collection()
+    if collection is None:
+        raise RuntimeError("Vector DB unavailable (is chromadb installed and the embedding model reachable?)")
+
+    root = Path(directory).resolve()
+    manifest = load_manifest(manifest_path)
+    stats = {"files_seen": 0, "files_indexed": 0, "files_skipped": 0, "files_removed": 0, "chunks": 0}
+    seen = set()
+    pending: list[tuple[str, str, dict]] = []
+    in_flight: deque[tuple[Future, list[tuple[str, str, dict]]]] = deque()
+    # Bulk documents skip the query cache and go straight to the embedding pool. The
+    # CLI uses processes; inside the server (/api/ingest) threads share the loaded
+    # model instead of forking the threaded uvicorn process.
+    embedder = EmbeddingService(cache_size=0, workers=workers, use_processes=use_processes)
+
+    def upsert(vectors: list, batch: list) -> None:
+        collection.upsert(
+            ids=[item[0] for item in batch],
+            documents=[item[1] for item in batch],
+            metadatas=[item[2] for item in batch],
+            embeddings=[v.tolist() for v in vectors],
+        )
+        # Keep the serving BM25 index in step when ingesting in-process.
+        if lexical_index.ready:
+            lexical_index.add([item[0] for item in batch], [item[1] for item in batch])
+        stats["chunks"] += len(batch)
+
+    def drain(limit: int) -> None:
+        while len(in_flight) > limit:
+            future, batch = in_flight.popleft()
+            upsert(future.result(), batch)
+
+    def dispatch() -> None:
+        batch = pending[:batch_size]
+        del pending[:batch_size]
+        documents = [item[1] for item in batch]
+        in_flight.append((embedder.submit(documents), batch))
+        # Bound memory: never more than two batches per worker waiting on embeddings.
+        drain(max(1, workers) * 2)
+
+    try:
+        for path in iter_documents(root):
+            rel_path = path.relative_to(root).as_posix()
+            # Keyed by absolute path so a file reached through a parent or child
+            # directory is still one manifest entry with one set of chunk ids.
+            key = path.resolve().as_posix()
+            seen.add(key)
+            legacy_key = f"{root.as_posix()}::{rel_path}"
+            if legacy_key in manifest:
+                # Entry from before absolute-path keys: drop its chunks, re-index below.
+                stale = chunk_ids(legacy_key, manifest.pop(legacy_key)["chunks"])
+                collection.delete(ids=stale)
+                lexical_index.remove(stale)
+            stats["files_seen"] += 1
+
+            digest = file_hash(path)
+            previous = manifest.get(key)
+            if previous and previous["hash"] == digest and not force:
+                stats["files_skipped"] += 1
+                continue
+
+            chunks = chunk_text(read_document(path))
+            ids = chunk_ids(key, len(chunks))
+            if previous and previous["chunks"] > len(chunks):
+                stale = chunk_ids(key, previous["chunks"])[len(chunks):]
+                collection.delete(ids=stale)
+                lexical_index.remove(stale)
+            for i, (chunk_id, chunk) in enumerate(zip(ids, chunks)):
+                pending.append((chunk_id, chunk, {"source": path.name, "path": rel_path, "chunk": i}))
+            while len(pending) >= batch_size:
+                dispatch()
+
+            manifest[key] = {"hash": digest, "chunks": len(chunks)}
+            stats["files_indexed"] += 1
+
+        while pending:
+            dispatch()
+        drain(0)
+        save_manifest(manifest_path, manifest)
+
+        # Files that disappeared from this directory (or its subdirectories) since the last run.
+        prefixes = (f"{root.as_posix().rstrip('/')}/", f"{root.as_posix()}::")
+        for key in [k for k in manifest if k.startswith(prefixes) and k not in seen]:
+            stale = chunk_ids(key, manifest[key]["chunks"])
+            collection.delete(ids=stale)
+            lexical_index.remove(stale)
+            del manifest[key]
+            stats["files_removed"] += 1
+        save_manifest(manifest_path, manifest)
+        if isinstance(collection, LocalVectorStore):
+            collection.maybe_compact()
+    finally:
+        embedder.close()
+
+    return stats
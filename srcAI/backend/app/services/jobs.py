@@ -0,0 +1,255 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import JOB_STORE_DB, JOB_TTL, JOB_WORKERS
+
+
+TERMINAL_STATUSES = ("completed", "failed")
+PRUNE_INTERVAL = 60.0
+
+
+class MemoryJobStore:
+    # Jobs live only as long as the process; fine for a single dev worker.
+    persistent = False
+
+    def __init__(self):
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields, updated=time.time())
+
+    def unfinished(self) -> list[str]:
+        return []
+
+    def prune(self, older_than: float) -> None:
+        with self._lock:
+            for job_id in [
+                j["id"]
+                for j in self._jobs.values()
+                if j["status"] in TERMINAL_STATUSES and j["updated"] < older_than
+            ]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    # Durable store: queued/running jobs are picked up again after a restart.
+    persistent = True
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+            "payload TEXT NOT NULL, result TEXT, error TEXT, "
+            "created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created)")
+        self._db.commit()
+
+    def create(self, job: dict) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, payload, result, error, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job["id"],
+                    job["kind"],
+                    job["status"],
+                    json.dumps(job["payload"]),
+                    json.dumps(job["result"]) if job["result"] is not None else None,
+                    job["error"],
+                    job["created"],
+                    job["updated"],
+                ),
+            )
+            self._db.commit()
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, status, payload, result, error, created, updated "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "payload": json.loads(row[3]),
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "created": row[6],
+            "updated": row[7],
+        }
+
+    def update(self, job_id: str, **fields) -> None:
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+            self._db.commit()
+
+    def unfinished(self) -> list[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self, older_than: float) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated < ?",
+                (older_than,),
+            )
+            self._db.commit()
+
+
+JobHandler = Callable[[dict], Awaitable[dict]]
+
+
+class JobQueue:
+    # The store is opened by start() (from the app lifespan), not at import. SQLite
+    # store calls run in the threadpool so job traffic never blocks the event loop.
+
+    def __init__(self, db_path: str, workers: int, ttl: float):
+        self.db_path = db_path
+        self.store: MemoryJobStore | SQLiteJobStore | None = None
+        self.workers = max(1, workers)
+        self.ttl = ttl
+        self._handlers: dict[str, JobHandler] = {}
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._watchers: dict[str, list[asyncio.Queue]] = {}
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self) -> list[str]:
+        return list(self._handlers)
+
+    async def _call(self, method, *args, **kwargs):
+        if self.store.persistent:
+            return await run_in_threadpool(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def start(self) -> None:
+        if self.store is None:
+            self.store = await run_in_threadpool(SQLiteJobStore, self.db_path) if self.db_path else MemoryJobStore()
+        self._queue = asyncio.Queue()
+        for job_id in await self._call(self.store.unfinished):
+            await self._call(self.store.update, job_id, status="queued")
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._pruner()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, payload: dict) -> dict:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created": now,
+            "updated": now,
+        }
+        await self._call(self.store.create, job)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> dict | None:
+        return await self._call(self.store.get, job_id)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def watch(self, job_id: str):
+        # Yields the job now and after every status change until it finishes.
+        updates: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(job_id, []).append(updates)
+        try:
+            job = await self.get(job_id)
+            while job is not None:
+                yield job
+                if job["status"] in TERMINAL_STATUSES:
+                    break
+                job = await updates.get()
+        finally:
+            self._watchers[job_id].remove(updates)
+            if not self._watchers[job_id]:
+                del self._watchers[job_id]
+
+    async def _set(self, job_id: str, **fields) -> None:
+        await self._call(self.store.update, job_id, **fields)
+        job = await self.get(job_id)
+        for updates in self._watchers.get(job_id, []):
+            updates.put_nowait(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.get(job_id)
+                if job is None or job["status"] in TERMINAL_STATUSES:
+                    continue
+                await self._set(job_id, status="running")
+                try:
+                    result = await self._handlers[job["kind"]](job["payload"])
+                    await self._set(job_id, status="completed", result=result)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    detail = getattr(e, "detail", None) or str(e)
+                    await self._set(job_id, status="failed", error=str(detail))
+            finally:
+                self._queue.task_done()
+
+    async def _pruner(self) -> None:
+        # Finished jobs older than the TTL are dropped on a timer, not per submit.
+        while True:
+            try:
+                await self._call(self.store.prune, time.time() - self.ttl)
+            except Exception as e:
+                print(f"Job prune failed: {e}")
+            await asyncio.sleep(min(PRUNE_INTERVAL, self.ttl))
+
+
+job_queue = JobQueue(JOB_STORE_DB, workers=JOB_WORKERS, ttl=JOB_TTL)
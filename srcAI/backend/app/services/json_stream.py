@@ -0,0 +1,99 @@
+import json
+
+
+class IncrementalJSONParser:
+    # Consumes model output as it streams and tracks the first top-level JSON
+    # object: each top-level field is decoded as soon as the value after it ends,
+    # and `complete` flips once the object's closing brace arrives, so the caller
+    # can stop generation instead of waiting for trailing text or whitespace.
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: dict = {}
+        self.complete = False
+        self._pos = 0
+        self._start: int | None = None
+        self._end: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._phase = "key"
+        self._key: str | None = None
+        self._token_start = 0
+
+    def feed(self, text: str) -> dict:
+        # Returns the fields completed by this piece of text.
+        if self.complete:
+            return {}
+        self.buffer += text
+        completed = {}
+        buffer = self.buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._start is None:
+                if char == "{":
+                    self._start = i
+                    self._depth = 1
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._phase == "key":
+                        self._key = self._decode(self._token_start, i + 1)
+                        self._phase = "colon"
+                i += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._phase == "key":
+                    self._token_start = i
+            elif char == ":" and self._depth == 1 and self._phase == "colon":
+                self._phase = "value"
+                self._token_start = i + 1
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value(i, completed)
+                    self.complete = True
+                    self._end = i + 1
+                    self._pos = i + 1
+                    return completed
+            elif char == "," and self._depth == 1 and self._phase == "value":
+                self._finish_value(i, completed)
+                self._phase = "key"
+            i += 1
+        self._pos = i
+        return completed
+
+    def _decode(self, start: int, end: int):
+        try:
+            return json.loads(self.buffer[start:end])
+        except json.JSONDecodeError:
+            return None
+
+    def _finish_value(self, end: int, completed: dict) -> None:
+        if self._phase != "value" or self._key is None:
+            return
+        raw = self.buffer[self._token_start : end].strip()
+        if raw:
+            value = self._decode(self._token_start, end)
+            if value is not None or raw == "null":
+                self.fields[self._key] = value
+                completed[self._key] = value
+        self._key = None
+
+    def json_text(self) -> str | None:
+        # The complete object's source text, or None while it is still open.
+        if not self.complete:
+            return None
+        return self.buffer[self._start : self._end]
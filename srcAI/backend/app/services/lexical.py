@@ -0,0 +1,251 @@
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+
+import numpy as np
+
+
+# Keeps indicator-shaped tokens whole (CVE-2021-44228, 10.0.0.5, evil.example.com,
+# T1059.001, hashes) and also indexes their parts.
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._\-:/@][a-z0-9]+)*")
+_PART_RE = re.compile(r"[._\-:/@]")
+_ENTITY_RE = re.compile(
+    r"cve-\d{4}-\d{4,}"
+    r"|\d{1,3}(?:\.\d{1,3}){3}"
+    r"|[a-f0-9]{32}|[a-f0-9]{40}|[a-f0-9]{64}"
+    r"|t\d{4}(?:\.\d{3})?"
+    r"|(?:[a-z0-9-]+\.)+[a-z]{2,}"
+)
+# Terms in more than this share of chunks are only scored for chunks matched by rarer terms
+COMMON_TERM_RATIO = 0.1
+STOPWORDS = frozenset(
+    "a an and are as at be been by for from has have in into is it its of on or that the "
+    "their there this to was were which with will can could should would our your they "
+    "them then than when what who how not but also any all some such may via".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if _PART_RE.search(token):
+            tokens.extend(p for p in _PART_RE.split(token) if len(p) > 1 and p not in STOPWORDS)
+    return tokens
+
+
+def is_entity(token: str) -> bool:
+    return _ENTITY_RE.fullmatch(token) is not None
+
+
+class BM25Index:
+    # In-memory inverted index over chunk texts. Postings are compact arrays
+    # (int32 doc numbers, uint16 term frequencies) scored with numpy, so a query
+    # touches only the postings of its own terms. Removed or replaced chunks are
+    # tombstoned and swept out by compact(); document frequencies include
+    # tombstones until then.
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._terms: dict[str, int] = {}
+        self._postings: list[array] = []
+        self._freqs: list[array] = []
+        self._ids: list[str | None] = []
+        self._numbers: dict[str, int] = {}
+        self._lengths = array("f")
+        self._alive = bytearray()
+        self._total_length = 0.0
+        self._posting_count = 0
+        self._dead = 0
+        self._norm: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def add(self, ids: list[str], texts: list[str]) -> None:
+        # Adding an id that is already indexed replaces it.
+        with self._lock:
+            for chunk_id, text in zip(ids, texts):
+                self._remove(chunk_id)
+                tokens = tokenize(text or "")
+                number = len(self._ids)
+                self._ids.append(chunk_id)
+                self._numbers[chunk_id] = number
+                self._lengths.append(len(tokens))
+                self._alive.append(1)
+                self._total_length += len(tokens)
+                for term, freq in Counter(tokens).items():
+                    term_id = self._terms.get(term)
+                    if term_id is None:
+                        term_id = self._terms[term] = len(self._postings)
+                        self._postings.append(array("i"))
+                        self._freqs.append(array("H"))
+                    self._postings[term_id].append(number)
+                    self._freqs[term_id].append(min(freq, 65535))
+                self._posting_count += len(set(tokens))
+            self._norm = None
+            self._maybe_compact()
+
+    def remove(self, ids: list[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                self._remove(chunk_id)
+            self._norm = None
+            self._maybe_compact()
+
+    def _remove(self, chunk_id: str) -> None:
+        number = self._numbers.pop(chunk_id, None)
+        if number is None:
+            return
+        self._ids[number] = None
+        self._alive[number] = 0
+        self._total_length -= self._lengths[number]
+        self._dead += 1
+
+    def _maybe_compact(self) -> None:
+        if self._dead > 1000 and self._dead > len(self._numbers) // 4:
+            self.compact()
+
+    def compact(self) -> None:
+        with self._lock:
+            if not self._dead:
+                return
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            remap = np.full(len(self._ids), -1, dtype=np.int32)
+            remap[alive] = np.arange(int(alive.sum()), dtype=np.int32)
+            for term_id, postings in enumerate(self._postings):
+                numbers = remap[np.array(postings, dtype=np.int32)]
+                keep = numbers >= 0
+                self._postings[term_id] = array("i", numbers[keep].tobytes())
+                self._freqs[term_id] = array("H", np.array(self._freqs[term_id], dtype=np.uint16)[keep].tobytes())
+            self._ids = [chunk_id for chunk_id in self._ids if chunk_id is not None]
+            self._numbers = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+            self._lengths = array("f", np.array(self._lengths, dtype=np.float32)[alive].tobytes())
+            self._alive = bytearray(b"\x01" * len(self._ids))
+            self._posting_count = sum(len(p) for p in self._postings)
+            self._dead = 0
+            self._norm = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self.ready = False
+
+    def build(self, collection, page_size: int = 5000) -> int:
+        # Full (re)build from the Chroma collection, paged so memory stays flat.
+        self.clear()
+        offset = 0
+        while True:
+            batch = collection.get(include=["documents"], limit=page_size, offset=offset)
+            ids = batch["ids"]
+            if not ids:
+                break
+            self.add(ids, batch["documents"])
+            offset += len(ids)
+        self.ready = True
+        return len(self)
+
+    def search(self, query: str, k: int = 20) -> list[tuple[str, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            live = len(self._numbers)
+            if not terms or not live:
+                return []
+            return self._search(terms, k, live)
+
+    def _search(self, terms: set[str], k: int, live: int) -> list[tuple[str, float]]:
+        # numpy views of the postings must not outlive this call: an array('i')
+        # exporting its buffer cannot grow, so add() would fail.
+        if self._norm is None:
+            lengths = np.frombuffer(self._lengths, dtype=np.float32)
+            avgdl = self._total_length / live or 1.0
+            self._norm = self.k1 * (1 - self.b + self.b * lengths / avgdl)
+        norm = self._norm
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        selective, common = [], []
+        for term in terms:
+            term_id = self._terms.get(term)
+            if term_id is None or not self._postings[term_id]:
+                continue
+            df = len(self._postings[term_id])
+            (common if df > live * COMMON_TERM_RATIO else selective).append((term_id, df))
+
+        def score(term_id: int, df: int, positions: np.ndarray | None = None) -> None:
+            numbers = np.frombuffer(self._postings[term_id], dtype=np.int32)
+            freqs = np.frombuffer(self._freqs[term_id], dtype=np.uint16)
+            if positions is not None:
+                numbers, freqs = numbers[positions], freqs[positions]
+            freqs = freqs.astype(np.float32)
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            scores[numbers] += idf * freqs * (self.k1 + 1) / (freqs + norm[numbers])
+
+        for term_id, df in selective:
+            score(term_id, df)
+        # Terms in a large share of chunks only re-score chunks the selective terms
+        # already matched (postings are sorted, so a binary search finds them);
+        # walking their full postings would dominate query time for little signal.
+        candidates = np.flatnonzero(scores) if selective else None
+        for term_id, df in common:
+            positions = None
+            if candidates is not None:
+                numbers = np.frombuffer(self._postings[term_id], dtype=np.int32)
+                positions = np.minimum(np.searchsorted(numbers, candidates), len(numbers) - 1)
+                positions = positions[numbers[positions] == candidates]
+            score(term_id, df, positions)
+        if self._dead:
+            scores *= np.frombuffer(self._alive, dtype=np.uint8)
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self._ids[i], float(scores[i])) for i in hits]
+
+    def stats(self) -> dict:
+        # Lock-free so /api/health is not held up by a running build; counts may lag.
+        return {
+            "ready": self.ready,
+            "chunks": len(self._numbers),
+            "terms": len(self._terms),
+            "postings": self._posting_count,
+        }
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def rerank(query: str, candidates: list[tuple[str, str, float]]) -> list[tuple[str, str, float]]:
+    # Cheap second pass over (id, text, fused score): exact indicator matches
+    # (CVE, IP, hash, domain, ATT&CK id) dominate, then query-term coverage.
+    query_terms = set(tokenize(query))
+    if not query_terms or not candidates:
+        return candidates
+    entities = {t for t in query_terms if is_entity(t)}
+    top = max(score for _, _, score in candidates) or 1.0
+    rescored = []
+    for chunk_id, text, score in candidates:
+        # Substring checks instead of re-tokenizing every candidate keep this in
+        # the tens of microseconds.
+        lowered = (text or "").lower()
+        coverage = sum(term in lowered for term in query_terms) / len(query_terms)
+        matched = sum(entity in lowered for entity in entities)
+        rescored.append((chunk_id, text, matched + 0.5 * coverage + score / top))
+    rescored.sort(key=lambda item: item[2], reverse=True)
+    return rescored
+
+
+lexical_index = BM25Index()
@@ -0,0 +1,312 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+
+
+# Per-request stage timings in ms, filled in by stage() and sent as a Server-Timing header.
+request_timings: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    # Nearest-rank percentile; 0.0 for no samples.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+class RollingLatency:
+    # Last few samples of a background probe, summarised for /api/health.
+    def __init__(self, size: int = 20):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def summary(self) -> dict | None:
+        samples = list(self._samples)
+        if not samples:
+            return None
+        return {
+            "last_ms": round(samples[-1] * 1000, 2),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "max_ms": round(max(samples) * 1000, 2),
+            "samples": len(samples),
+        }
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # label values -> [cumulative bucket counts, sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (f'{bound:g}',))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Gauge:
+    # Read at scrape time from a callback returning {label values: value}.
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...],
+        collect: Callable[[], dict[tuple[str, ...], float]],
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.collect()
+        except Exception:
+            values = {}
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+_registry: list = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_request_seconds = register(
+    Histogram(
+        "cybersentinel_http_request_duration_seconds",
+        "HTTP request latency by route.",
+        ("method", "route", "status"),
+    )
+)
+stage_seconds = register(
+    Histogram(
+        "cybersentinel_stage_duration_seconds",
+        "Latency of each analysis/report stage.",
+        ("stage",),
+    )
+)
+tokens_total = register(
+    Counter("cybersentinel_tokens_total", "Tokens processed by Ollama.", ("kind",))
+)
+cache_lookups_total = register(
+    Counter("cybersentinel_cache_lookups_total", "Analysis cache lookups.", ("cache", "result"))
+)
+fallback_parses_total = register(
+    Counter(
+        "cybersentinel_fallback_parses_total",
+        "Model responses that were not valid JSON and used the fallback analysis.",
+    )
+)
+prompt_tokens = register(
+    Histogram(
+        "cybersentinel_prompt_tokens",
+        "Estimated prompt size per generation (context part and whole prompt).",
+        ("part",),
+        buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+    )
+)
+context_passages_total = register(
+    Counter(
+        "cybersentinel_context_passages_total",
+        "Retrieved passages by prompt-assembly outcome.",
+        ("result",),
+    )
+)
+early_stops_total = register(
+    Counter(
+        "cybersentinel_early_stops_total",
+        "Unstructured generations cut off once the JSON object was complete.",
+    )
+)
+classifier_agreement_total = register(
+    Counter(
+        "cybersentinel_classifier_agreement_total",
+        "Pre-classifier predictions checked against the LLM analysis.",
+        ("field", "result"),
+    )
+)
+fast_path_total = register(
+    Counter(
+        "cybersentinel_fast_path_total",
+        "Pre-classified requests by outcome (answered without the LLM or passed on).",
+        ("result",),
+    )
+)
+cascade_requests_total = register(
+    Counter(
+        "cybersentinel_cascade_requests_total",
+        "Model cascade generations by tier and outcome (accepted, escalated, error).",
+        ("tier", "result"),
+    )
+)
+cascade_escalations_total = register(
+    Counter(
+        "cybersentinel_cascade_escalations_total",
+        "Small-model answers sent on to the large model, by rule.",
+        ("reason",),
+    )
+)
+cascade_tier_seconds = register(
+    Histogram(
+        "cybersentinel_cascade_tier_duration_seconds",
+        "Generation latency per cascade tier (including self-consistency samples).",
+        ("tier",),
+    )
+)
+errors_total = register(
+    Counter("cybersentinel_errors_total", "Errors by stage.", ("stage",))
+)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage=name)
+    timings = request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds * 1000
+
+
+@contextmanager
+def stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors_total.inc(stage=name)
+        raise
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+def record_ollama_result(result: dict) -> None:
+    # Ollama reports its own durations in nanoseconds on the final response.
+    for field, name in (
+        ("load_duration", "ollama_load"),
+        ("prompt_eval_duration", "ollama_prompt_eval"),
+        ("eval_duration", "ollama_eval"),
+    ):
+        if result.get(field):
+            observe_stage(name, result[field] / 1e9)
+    tokens_total.inc(result.get("prompt_eval_count", 0), kind="prompt")
+    tokens_total.inc(result.get("eval_count", 0), kind="completion")
+
+
+class TimingMiddleware:
+    # Pure ASGI so streaming bodies pass through untouched. Records request
+    # latency per route template and adds a Server-Timing header from the
+    # stages finished before the response started.
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict = {}
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if timings:
+                    header = ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
+            request_timings.reset(token)
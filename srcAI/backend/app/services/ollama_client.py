@@ -1,61 +1,392 @@
+import asyncio
 import json
-import requests
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+
+import httpx
 from fastapi import HTTPException
-from ..config import OLLAMA_URL, MODEL_NAME
+from .metrics import (
+    context_passages_total,
+    early_stops_total,
+    errors_total,
+    observe_stage,
+    prompt_tokens,
+    record_ollama_result,
+    RollingLatency,
+)
+from .json_stream import IncrementalJSONParser
+from .prompt import context_budget, count_tokens, fit_context
+from ..models import ThreatAnalysis
+from ..config import (
+    OLLAMA_URLS,
+    OLLAMA_BREAKER_THRESHOLD,
+    OLLAMA_BREAKER_COOLDOWN,
+    MODEL_CONTEXT_TOKENS,
+    MODEL_NAME,
+    OLLAMA_TIMEOUT,
+    OLLAMA_MAX_CONNECTIONS,
+    OLLAMA_KEEPALIVE_CONNECTIONS,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_STRUCTURED_OUTPUT,
+)
 
 
-def query_ollama(prompt: str, context: str = "") -> tuple[str, int]:
-    full_prompt = f"""You are CyberSentinel, an expert cybersecurity threat analyst.
+SAMPLING_OPTIONS = {"temperature": 0.7, "top_p": 0.9, "num_ctx": MODEL_CONTEXT_TOKENS}
+
+# One pooled client per process; connections to Ollama are kept alive and reused.
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# Errors after which the same request is retried on another backend.
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.RemoteProtocolError)
+
+
+class OllamaBackend:
+    def __init__(self, url: str):
+        url = url.rstrip("/")
+        self.generate_url = url if url.endswith("/api/generate") else f"{url}/api/generate"
+        self.base_url = self.generate_url[: -len("/api/generate")]
+        self.in_flight = 0
+        self.latency: float | None = None
+        # None until the first health probe; such a backend is still routed to.
+        self.healthy: bool | None = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_check: float | None = None
+        self.last_error: str | None = None
+        self.probe_latency = RollingLatency()
+        self.loaded_models: list[str] | None = None
+
+    def available(self, now: float) -> bool:
+        return self.healthy is not False and now >= self.open_until
+
+    def load_score(self) -> float:
+        # Expected wait if this request joined the backend's current work.
+        return (self.in_flight + 1) * (self.latency or 1.0)
+
+    def record_success(self, elapsed: float) -> None:
+        self.latency = elapsed if self.latency is None else 0.7 * self.latency + 0.3 * elapsed
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self, error) -> None:
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        if self.failures >= OLLAMA_BREAKER_THRESHOLD:
+            self.open_until = time.time() + OLLAMA_BREAKER_COOLDOWN
+
+    def status(self) -> dict:
+        return {
+            "url": self.base_url,
+            "healthy": self.healthy,
+            "circuit": "open" if time.time() < self.open_until else "closed",
+            "in_flight": self.in_flight,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "last_check": self.last_check,
+            "last_error": self.last_error,
+            "probe_latency": self.probe_latency.summary(),
+            "loaded_models": self.loaded_models,
+        }
+
+
+class OllamaRouter:
+    # Sends each generation to the least-loaded healthy backend. Connection
+    # failures and 5xx answers move the request to the next backend, and
+    # repeated failures open that backend's circuit for a cooldown period.
+
+    def __init__(self, urls: list[str]):
+        self.backends = [OllamaBackend(url) for url in urls]
+
+    def pick(self, exclude: list[OllamaBackend]) -> OllamaBackend | None:
+        now = time.time()
+        remaining = [b for b in self.backends if b not in exclude]
+        candidates = [b for b in remaining if b.available(now)]
+        if not candidates:
+            # Health data may be stale; trying a backend beats failing outright.
+            candidates = [b for b in remaining if now >= b.open_until] or remaining
+        return min(candidates, key=OllamaBackend.load_score, default=None)
+
+    def any_healthy(self) -> bool:
+        # Only backends a probe has confirmed count; unchecked ones are not "online".
+        now = time.time()
+        return any(b.healthy and now >= b.open_until for b in self.backends)
+
+    def unchecked(self) -> bool:
+        return all(b.healthy is None for b in self.backends)
+
+    def status(self) -> list[dict]:
+        return [b.status() for b in self.backends]
+
+    @asynccontextmanager
+    async def stream_generate(self, payload: dict):
+        # Failover only happens before the first byte; a started stream is not replayed.
+        tried: list[OllamaBackend] = []
+        last_error: Exception | None = None
+        while (backend := self.pick(tried)) is not None:
+            tried.append(backend)
+            backend.in_flight += 1
+            started = time.perf_counter()
+            stack = AsyncExitStack()
+            try:
+                response = await stack.enter_async_context(
+                    get_client().stream("POST", backend.generate_url, json=payload)
+                )
+            except RETRYABLE_ERRORS as e:
+                backend.in_flight -= 1
+                backend.record_failure(e)
+                last_error = e
+                await stack.aclose()
+                continue
+            except BaseException as e:
+                backend.in_flight -= 1
+                if isinstance(e, httpx.HTTPError):
+                    backend.record_failure(e)
+                await stack.aclose()
+                raise
+            if response.status_code >= 500 and len(tried) < len(self.backends):
+                backend.in_flight -= 1
+                backend.record_failure(f"HTTP {response.status_code}")
+                await stack.aclose()
+                continue
+
+            try:
+                async with stack:
+                    yield response
+                backend.record_success(time.perf_counter() - started)
+            except httpx.HTTPError as e:
+                backend.record_failure(e)
+                raise
+            finally:
+                backend.in_flight -= 1
+            return
+        raise last_error or httpx.ConnectError("No Ollama backend configured")
+
+    async def check_health(self) -> None:
+        # Called by the background health monitor, never on the request path.
+        async def probe(backend: OllamaBackend) -> None:
+            started = time.perf_counter()
+            try:
+                resp = await get_client().get(f"{backend.base_url}/api/tags", timeout=5)
+                backend.probe_latency.observe(time.perf_counter() - started)
+                backend.healthy = resp.status_code == 200
+                if not backend.healthy:
+                    backend.last_error = f"HTTP {resp.status_code}"
+            except Exception as e:
+                backend.healthy = False
+                backend.last_error = str(e) or type(e).__name__
+            if backend.healthy:
+                # Loaded models are informational; an old Ollama without /api/ps stays healthy.
+                try:
+                    resp = await get_client().get(f"{backend.base_url}/api/ps", timeout=5)
+                    resp.raise_for_status()
+                    backend.loaded_models = [m.get("name") for m in resp.json().get("models", [])]
+                except Exception:
+                    backend.loaded_models = None
+            backend.last_check = time.time()
+
+        await asyncio.gather(*(probe(b) for b in self.backends))
+
+
+router = OllamaRouter(OLLAMA_URLS)
 
-Context from knowledge base:
-{context}
 
-User Scenario: {prompt}
+async def preload_model(model: str = MODEL_NAME) -> None:
+    # Loads the model with the serving num_ctx (a different value would force a reload
+    # on the first real request). Ollama treats an empty prompt as load-only and skips
+    # the system prompt, so the fixed head of the prompt is sent and one token generated
+    # to get the shared prefix into the KV cache. Every backend is asked; one success is
+    # enough to serve traffic.
+    async def preload(backend: OllamaBackend) -> None:
+        response = await get_client().post(
+            backend.generate_url,
+            json={
+                "model": model,
+                "system": SYSTEM_PROMPT,
+                "prompt": build_prompt(""),
+                "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": {**SAMPLING_OPTIONS, "num_predict": 1},
+            },
+        )
+        response.raise_for_status()
 
-Analyze this cybersecurity scenario and provide:
+    results = await asyncio.gather(*(preload(b) for b in router.backends), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if len(errors) == len(results):
+        raise errors[0] if errors else RuntimeError("No Ollama backend configured")
+
+
+# Identical for every request and sent as the system prompt, so it forms a stable
+# prefix Ollama can keep in its KV cache; only build_prompt's part is evaluated anew.
+SYSTEM_PROMPT = """You are CyberSentinel, an expert cybersecurity threat analyst.
+
+You will be given context from a knowledge base and a user scenario. Analyze the scenario and provide:
 1. Threat Type (e.g., Phishing, Malware, DDoS, Ransomware, Insider Threat, Social Engineering)
 2. Severity Level (Low, Medium, or High)
 3. Detailed Analysis (2-3 paragraphs)
 4. Mitigation Recommendations (specific, actionable steps)
 
 Format your response as JSON:
-{{
+{
     "threat_type": "...",
     "severity": "...",
     "analysis": "...",
     "recommendations": ["...", "...", "..."]
-}}"""
+}"""
+SYSTEM_PROMPT_TOKENS = count_tokens(SYSTEM_PROMPT)
 
-    try:
-        response = requests.post(
-            OLLAMA_URL,
-            json={
-                "model": MODEL_NAME,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {"temperature": 0.7, "top_p": 0.9},
-            },
-            timeout=120,
-        )
 
-        if response.status_code == 200:
-            result = response.json()
-            response_text = result.get("response", "")
+def build_prompt(prompt: str, context: str = "") -> str:
+    return f"""Context from knowledge base:
+{context}
+
+User Scenario: {prompt}"""
+
 
-            start_idx = response_text.find("{")
-            end_idx = response_text.rfind("}") + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                token_count = result.get("eval_count", 0) + result.get("prompt_eval_count", 0)
-                return json_str, token_count
-            return response_text, result.get("eval_count", 0)
+def prepare_prompt(prompt: str, context: str = "") -> str:
+    # Fits the retrieved context into what the context window leaves over.
+    budget = context_budget(SYSTEM_PROMPT_TOKENS + count_tokens(build_prompt(prompt)))
+    fitted, stats = fit_context(prompt, context, budget)
+    text = build_prompt(prompt, fitted)
+    prompt_tokens.observe(stats["context_tokens"], part="context")
+    prompt_tokens.observe(SYSTEM_PROMPT_TOKENS + count_tokens(text), part="prompt")
+    for result in ("kept", "trimmed", "deduplicated", "dropped"):
+        if stats[result]:
+            context_passages_total.inc(stats[result], result=result)
+    return text
 
-        raise Exception(f"Ollama error: {response.status_code}")
 
-    except requests.exceptions.ConnectionError:
+def extract_json(response_text: str) -> str | None:
+    start_idx = response_text.find("{")
+    end_idx = response_text.rfind("}") + 1
+    if start_idx != -1 and end_idx > start_idx:
+        return response_text[start_idx:end_idx]
+    return None
+
+
+MODEL_FIELDS = ("threat_type", "severity", "analysis", "recommendations")
+
+
+def analysis_schema() -> dict:
+    # JSON schema for the model-generated part of ThreatAnalysis, passed as Ollama's
+    # `format` so decoding is constrained to a parseable object.
+    properties = ThreatAnalysis.model_json_schema()["properties"]
+    schema = {
+        "type": "object",
+        "properties": {name: dict(properties[name]) for name in MODEL_FIELDS},
+        "required": list(MODEL_FIELDS),
+    }
+    schema["properties"]["severity"]["enum"] = ["Low", "Medium", "High"]
+    return schema
+
+
+ANALYSIS_SCHEMA = analysis_schema()
+
+
+def generate_payload(prompt: str, context: str, stream: bool, model: str = MODEL_NAME) -> dict:
+    payload = {
+        "model": model,
+        "system": SYSTEM_PROMPT,
+        "prompt": prepare_prompt(prompt, context),
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": SAMPLING_OPTIONS,
+    }
+    if OLLAMA_STRUCTURED_OUTPUT:
+        payload["format"] = ANALYSIS_SCHEMA
+    return payload
+
+
+async def query_ollama(prompt: str, context: str = "", model: str = MODEL_NAME) -> tuple[str, int]:
+    # Streams internally so generation stops as soon as the JSON object is closed.
+    parts = []
+    final: dict = {}
+    async for chunk in stream_ollama(prompt, context, model):
+        parts.append(chunk.get("response", ""))
+        if chunk.get("done"):
+            final = chunk
+    response_text = "".join(parts)
+
+    json_str = final.get("json") or extract_json(response_text)
+    if json_str is not None:
+        token_count = final.get("eval_count", 0) + final.get("prompt_eval_count", 0)
+        return json_str, token_count
+    return response_text, final.get("eval_count", 0)
+
+
+async def stream_ollama(prompt: str, context: str = "", model: str = MODEL_NAME):
+    # Yields Ollama's NDJSON chunks as they arrive; the last one has "done": true.
+    # Chunks that complete top-level JSON fields carry them under "fields", and the
+    # last one carries the object's text under "json". The stream is read through to
+    # Ollama's done chunk, which has the real token counts and stage durations, and
+    # lets the pooled connection be reused. With structured output that chunk follows
+    # the closing brace; without it the model may keep generating prose, so the
+    # stream is cut once the object closes (done_reason "json_complete").
+    started = time.perf_counter()
+    payload = generate_payload(prompt, context, stream=True, model=model)
+    parser = IncrementalJSONParser()
+    eval_count = 0
+    try:
+        async with router.stream_generate(payload) as response:
+            if response.status_code != 200:
+                raise Exception(f"Ollama error: {response.status_code}")
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    eval_count += 1
+                fields = parser.feed(chunk.get("response", ""))
+                if fields:
+                    chunk["fields"] = fields
+                cut = not OLLAMA_STRUCTURED_OUTPUT and parser.complete and parser.fields
+                if cut and not chunk.get("done"):
+                    # Ollama's final stats never arrive; counts are ours (prompt is an estimate).
+                    early_stops_total.inc()
+                    chunk.update(
+                        done=True,
+                        done_reason="json_complete",
+                        eval_count=eval_count,
+                        prompt_eval_count=SYSTEM_PROMPT_TOKENS + count_tokens(payload["prompt"]),
+                    )
+                if chunk.get("done"):
+                    chunk["json"] = parser.json_text()
+                    observe_stage("ollama", time.perf_counter() - started)
+                    record_ollama_result(chunk)
+                    yield chunk
+                    break
+                yield chunk
+
+    except httpx.ConnectError:
+        errors_total.inc(stage="ollama")
         raise HTTPException(
             status_code=503,
-            detail="Cannot connect to Ollama. Please ensure Ollama is running on localhost:11434",
+            detail="Cannot connect to Ollama. Please ensure a backend listed in OLLAMA_URLS is running",
         )
+    except httpx.TimeoutException:
+        errors_total.inc(stage="ollama")
+        raise HTTPException(status_code=504, detail="Ollama request timed out")
     except Exception as e:
+        errors_total.inc(stage="ollama")
         raise HTTPException(status_code=500, detail=str(e))
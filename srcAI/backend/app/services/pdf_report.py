@@ -1,99 +1,145 @@
-from pathlib import Path
+import asyncio
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import HTTPException
 from fpdf import FPDF
 
-from ..config import REPORTS_DIR
+from ..config import PDF_WORKERS
+from ..models import ThreatAnalysis
+from .metrics import stage
 
 
-def generate_pdf_report(analysis) -> str:
+def _draw_case(pdf: FPDF, analysis) -> None:
+    severity_rgb = {
+        "Low": (40, 167, 69),
+        "Medium": (255, 193, 7),
+        "High": (220, 53, 69),
+    }
+    sev = analysis.severity or "Unknown"
+    sev_color = severity_rgb.get(sev, (108, 117, 125))
+
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_left_margin(10)
+    pdf.set_right_margin(10)
+
+    # Title
+    pdf.set_font("Helvetica", "B", 18)
+    pdf.cell(0, 12, "CyberSentinel Threat Analysis Report", ln=1, align='C')
+    pdf.ln(5)
+    
+    # Metadata
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(40, 6, "Case ID:", 0, 0)
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, str(analysis.case_id), 0, 1)
+    
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(40, 6, "Timestamp:", 0, 0)
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, str(analysis.timestamp), 0, 1)
+    
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(40, 6, "Threat Type:", 0, 0)
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, str(analysis.threat_type), 0, 1)
+    
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(40, 6, "Severity:", 0, 0)
+    pdf.set_text_color(*sev_color)
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(0, 6, str(sev), 0, 1)
+    pdf.set_text_color(0, 0, 0)
+    
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(40, 6, "Token Usage:", 0, 0)
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, str(analysis.token_usage), 0, 1)
+
+    # Scenario Section
+    pdf.ln(5)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, "Scenario", 0, 1)
+    pdf.set_font("Helvetica", "", 10)
+    scenario_text = str(analysis.scenario) if analysis.scenario else "No scenario provided"
+    pdf.multi_cell(0, 5, scenario_text)
+
+    # Analysis Section
+    pdf.ln(3)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, "Analysis", 0, 1)
+    pdf.set_font("Helvetica", "", 10)
+    analysis_text = str(analysis.analysis) if analysis.analysis else "No analysis provided"
+    pdf.multi_cell(0, 5, analysis_text)
+
+    # Recommendations Section
+    pdf.ln(3)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, "Recommendations", 0, 1)
+    pdf.set_font("Helvetica", "", 10)
+    recs = analysis.recommendations or ["No recommendations provided."]
+    for idx, rec in enumerate(recs, 1):
+        rec_text = f"{idx}. {str(rec)}"
+        pdf.multi_cell(0, 5, rec_text)
+        pdf.ln(1)
+
+    # Context Sources Section
+    pdf.ln(2)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, "Context Sources", 0, 1)
+    pdf.set_font("Helvetica", "", 10)
+    sources = analysis.context_sources or []
+    sources_text = ", ".join(str(s) for s in sources) if sources else "No specific sources cited"
+    pdf.multi_cell(0, 5, sources_text)
+
+
+def render_pdf_bytes(analyses: list[dict]) -> bytes:
+    # Runs in a worker process: takes plain dicts, returns the finished PDF.
+    pdf = FPDF()
+    for data in analyses:
+        _draw_case(pdf, ThreatAnalysis.model_validate(data))
+    return bytes(pdf.output())
+
+
+def render_zip_bytes(analyses: list[dict]) -> bytes:
+    # A case_id repeated in the request gets a numbered entry instead of a duplicate name.
+    buffer = io.BytesIO()
+    names = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for data in analyses:
+            name, n = f"cybersentinel_report_{data['case_id']}", 1
+            while f"{name}.pdf" in names:
+                n += 1
+                name = f"cybersentinel_report_{data['case_id']}-{n}"
+            names.add(f"{name}.pdf")
+            archive.writestr(f"{name}.pdf", render_pdf_bytes([data]))
+    return buffer.getvalue()
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if _pool is None and PDF_WORKERS > 0:
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def render_report(analyses: list[ThreatAnalysis], fmt: str = "pdf") -> bytes:
+    render = render_zip_bytes if fmt == "zip" else render_pdf_bytes
+    payload = [a.model_dump() for a in analyses]
     try:
-        Path(REPORTS_DIR).mkdir(exist_ok=True)
-        pdf_path = f"{REPORTS_DIR}/cybersentinel_report_{analysis.case_id}.pdf"
-
-        severity_rgb = {
-            "Low": (40, 167, 69),
-            "Medium": (255, 193, 7),
-            "High": (220, 53, 69),
-        }
-        sev = analysis.severity or "Unknown"
-        sev_color = severity_rgb.get(sev, (108, 117, 125))
-
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.set_left_margin(10)
-        pdf.set_right_margin(10)
-
-        # Title
-        pdf.set_font("Helvetica", "B", 18)
-        pdf.cell(0, 12, "CyberSentinel Threat Analysis Report", ln=1, align='C')
-        pdf.ln(5)
-        
-        # Metadata
-        pdf.set_font("Helvetica", "B", 10)
-        pdf.cell(40, 6, "Case ID:", 0, 0)
-        pdf.set_font("Helvetica", "", 10)
-        pdf.cell(0, 6, str(analysis.case_id), 0, 1)
-        
-        pdf.set_font("Helvetica", "B", 10)
-        pdf.cell(40, 6, "Timestamp:", 0, 0)
-        pdf.set_font("Helvetica", "", 10)
-        pdf.cell(0, 6, str(analysis.timestamp), 0, 1)
-        
-        pdf.set_font("Helvetica", "B", 10)
-        pdf.cell(40, 6, "Threat Type:", 0, 0)
-        pdf.set_font("Helvetica", "", 10)
-        pdf.cell(0, 6, str(analysis.threat_type), 0, 1)
-        
-        pdf.set_font("Helvetica", "B", 10)
-        pdf.cell(40, 6, "Severity:", 0, 0)
-        pdf.set_text_color(*sev_color)
-        pdf.set_font("Helvetica", "B", 10)
-        pdf.cell(0, 6, str(sev), 0, 1)
-        pdf.set_text_color(0, 0, 0)
-        
-        pdf.set_font("Helvetica", "B", 10)
-        pdf.cell(40, 6, "Token Usage:", 0, 0)
-        pdf.set_font("Helvetica", "", 10)
-        pdf.cell(0, 6, str(analysis.token_usage), 0, 1)
-
-        # Scenario Section
-        pdf.ln(5)
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.cell(0, 8, "Scenario", 0, 1)
-        pdf.set_font("Helvetica", "", 10)
-        scenario_text = str(analysis.scenario) if analysis.scenario else "No scenario provided"
-        pdf.multi_cell(0, 5, scenario_text)
-
-        # Analysis Section
-        pdf.ln(3)
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.cell(0, 8, "Analysis", 0, 1)
-        pdf.set_font("Helvetica", "", 10)
-        analysis_text = str(analysis.analysis) if analysis.analysis else "No analysis provided"
-        pdf.multi_cell(0, 5, analysis_text)
-
-        # Recommendations Section
-        pdf.ln(3)
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.cell(0, 8, "Recommendations", 0, 1)
-        pdf.set_font("Helvetica", "", 10)
-        recs = analysis.recommendations or ["No recommendations provided."]
-        for idx, rec in enumerate(recs, 1):
-            rec_text = f"{idx}. {str(rec)}"
-            pdf.multi_cell(0, 5, rec_text)
-            pdf.ln(1)
-
-        # Context Sources Section
-        pdf.ln(2)
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.cell(0, 8, "Context Sources", 0, 1)
-        pdf.set_font("Helvetica", "", 10)
-        sources = analysis.context_sources or []
-        sources_text = ", ".join(str(s) for s in sources) if sources else "No specific sources cited"
-        pdf.multi_cell(0, 5, sources_text)
-
-        pdf.output(pdf_path)
-        return pdf_path
+        # PDF_WORKERS=0 keeps rendering in the default thread pool instead.
+        with stage("pdf_render"):
+            return await asyncio.get_running_loop().run_in_executor(_get_pool(), render, payload)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {e}")
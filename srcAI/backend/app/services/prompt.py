@@ -0,0 +1,144 @@
+import re
+
+from ..config import (
+    MODEL_CONTEXT_TOKENS,
+    PROMPT_DEDUP_THRESHOLD,
+    PROMPT_EXTRACT_SENTENCES,
+    PROMPT_MAX_CONTEXT_TOKENS,
+    PROMPT_RESPONSE_TOKENS,
+)
+
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9_\-\.]*[a-z0-9]|[a-z0-9]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])|\n+")
+_PASSAGE_RE = re.compile(r"\n\s*\n")
+_STOPWORDS = frozenset(
+    "a an and are as at be been by for from has have in into is it its of on or that the "
+    "their there this to was were which with will can could should would our your they "
+    "them then than when what who how not but also any all some such may via".split()
+)
+
+
+def count_tokens(text: str) -> int:
+    # Tokenizer-free estimate close to llama-style BPE: about one token per four
+    # characters of a word, one per punctuation mark.
+    return sum(
+        -(-len(piece) // 4) if piece[0].isalnum() or piece[0] == "_" else 1
+        for piece in _TOKEN_RE.findall(text)
+    )
+
+
+def _stem(word: str) -> str:
+    # Crude suffix stripping so "links"/"link" and "credentials"/"credential" match.
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def terms(text: str) -> set[str]:
+    return {
+        _stem(w) for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS
+    }
+
+
+def split_passages(context: str) -> list[str]:
+    return [p.strip() for p in _PASSAGE_RE.split(context) if p.strip()]
+
+
+def split_sentences(passage: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(passage) if s.strip()]
+
+
+def _shingles(text: str, size: int = 5) -> set[tuple[str, ...]]:
+    words = text.lower().split()
+    if len(words) <= size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _select_sentences(sentences: list[str], query: set[str]) -> tuple[list[str], int]:
+    # Sentences sharing terms with the scenario, in their original order. A passage
+    # with no overlap keeps its opening sentence so it can still be ranked and trimmed.
+    scored = [(len(terms(s) & query), i) for i, s in enumerate(sentences)]
+    relevant = [sentences[i] for score, i in scored if score]
+    if not relevant:
+        return sentences[:1], 0
+    return relevant, len(terms(" ".join(relevant)) & query)
+
+
+def context_budget(template_tokens: int) -> int:
+    # Whatever the window leaves after the instructions/scenario and the reserved
+    # answer, capped so long retrievals don't dominate prompt-eval time.
+    room = MODEL_CONTEXT_TOKENS - PROMPT_RESPONSE_TOKENS - template_tokens
+    return max(0, min(PROMPT_MAX_CONTEXT_TOKENS, room))
+
+
+def fit_context(scenario: str, context: str, budget: int) -> tuple[str, dict]:
+    # Passages arrive in retrieval order (best first). Near-duplicate passages and
+    # sentences repeated by overlapping chunks are dropped, optionally only the
+    # scenario-relevant sentences are kept, then passages are ranked and packed
+    # into the token budget, trimming the last one at a sentence boundary.
+    passages = split_passages(context)
+    query = terms(scenario)
+    seen_shingles: set[tuple[str, ...]] = set()
+    seen_sentences: set[str] = set()
+    candidates = []
+    deduplicated = 0
+    for order, passage in enumerate(passages):
+        shingles = _shingles(passage)
+        if shingles and len(shingles & seen_shingles) / len(shingles) >= PROMPT_DEDUP_THRESHOLD:
+            deduplicated += 1
+            continue
+        seen_shingles |= shingles
+        sentences = []
+        for sentence in split_sentences(passage):
+            key = " ".join(sentence.lower().split())
+            if key not in seen_sentences:
+                seen_sentences.add(key)
+                sentences.append(sentence)
+        if not sentences:
+            deduplicated += 1
+            continue
+        if PROMPT_EXTRACT_SENTENCES and query:
+            sentences, matched = _select_sentences(sentences, query)
+        else:
+            matched = len(terms(" ".join(sentences)) & query)
+        score = (matched / len(query) if query else 0.0) + 1 / (order + 1)
+        candidates.append((score, order, sentences))
+
+    candidates.sort(key=lambda c: (-c[0], c[1]))
+    kept, used, trimmed, dropped = [], 0, 0, 0
+    for _, _, sentences in candidates:
+        text = " ".join(sentences)
+        cost = count_tokens(text) + 2
+        if used + cost <= budget:
+            kept.append(text)
+            used += cost
+            continue
+        partial = []
+        for sentence in sentences:
+            sentence_cost = count_tokens(sentence) + 1
+            if used + sentence_cost + 2 > budget:
+                break
+            partial.append(sentence)
+            used += sentence_cost
+        if partial:
+            kept.append(" ".join(partial))
+            used += 2
+            trimmed += 1
+        else:
+            dropped += 1
+
+    fitted = "\n\n".join(kept)
+    return fitted, {
+        "budget": budget,
+        "context_tokens": count_tokens(fitted),
+        "source_tokens": count_tokens(context),
+        "passages": len(passages),
+        "kept": len(kept),
+        "trimmed": trimmed,
+        "deduplicated": deduplicated,
+        "dropped": dropped,
+    }
@@ -1,53 +1,181 @@
+import threading
 from typing import Tuple, List
 
-from ..config import CHROMA_ENABLED
+from ..config import (
+    CHROMA_ENABLED,
+    HYBRID_RETRIEVAL,
+    RETRIEVAL_CANDIDATES,
+    RETRIEVAL_RERANK,
+    RETRIEVAL_RRF_K,
+    VECTOR_STORE,
+    VECTOR_STORE_PATH,
+)
+from .embeddings import embedding_service, get_embedding_fn
+from .lexical import lexical_index, reciprocal_rank_fusion, rerank
+from .metrics import stage
+from .vector_store import LocalVectorStore, VectorStore
 
 
-collection = None
+collection: VectorStore | None = None
+_init_lock = threading.Lock()
+_init_attempted = False
 
-try:
-    if CHROMA_ENABLED:
-        import chromadb
-        from chromadb.utils import embedding_functions
 
-        chroma_client = chromadb.PersistentClient(path="./chroma_db")
+def _open_local_store() -> VectorStore | None:
+    try:
+        return LocalVectorStore(VECTOR_STORE_PATH)
+    except Exception as e:
+        print(f"Local vector store init failed: {e}")
+        return None
+
+
+def init_vector_store():
+    # Opens the configured vector store on first call; chromadb is only imported
+    # here so importing the app stays fast. Called from the background warm-up.
+    global collection, _init_attempted
+    with _init_lock:
+        if _init_attempted or not CHROMA_ENABLED:
+            return collection
+        _init_attempted = True
+        if VECTOR_STORE == "local":
+            collection = _open_local_store()
+            return collection
         try:
-            embedding_fn = embedding_functions.DefaultEmbeddingFunction()
-        except BaseException as embed_err:
-            print(f"Embedding init failed (likely offline): {embed_err}")
-            embedding_fn = None
-
-        if embedding_fn:
-            try:
-                collection = chroma_client.get_collection(
-                    name="cybersec_docs", embedding_function=embedding_fn
-                )
-            except Exception:
-                collection = chroma_client.create_collection(
-                    name="cybersec_docs", embedding_function=embedding_fn
-                )
-except BaseException as db_err:
-    print(f"Chroma init failed: {db_err}")
-    collection = None
+            import chromadb
 
+            chroma_client = chromadb.PersistentClient(path="./chroma_db")
+            embedding_fn = get_embedding_fn()
 
-def retrieve_context(query: str, n_results: int = 3) -> Tuple[str, List[str]]:
-    if not collection:
-        return "", []
+            if embedding_fn:
+                try:
+                    collection = chroma_client.get_collection(
+                        name="cybersec_docs", embedding_function=embedding_fn
+                    )
+                except Exception:
+                    collection = chroma_client.create_collection(
+                        name="cybersec_docs", embedding_function=embedding_fn
+                    )
+        except BaseException as db_err:
+            print(f"Chroma init failed: {db_err}")
+            collection = None
+        return collection
+
+
+def retrieve_chunks(query: str, n_results: int = 3) -> Tuple[str, List[str], List[str]]:
+    return retrieve_chunks_batch([query], n_results)[0]
+
+
+def retrieve_chunks_batch(
+    queries: List[str], n_results: int = 3
+) -> List[Tuple[str, List[str], List[str]]]:
+    # One (cached, micro-batched) embedding pass and one collection query for the whole batch.
+    if not collection or not queries:
+        return [("", [], []) for _ in queries]
     try:
-        results = collection.query(query_texts=[query], n_results=n_results)
-        if results["documents"] and results["documents"][0]:
-            context = "\n\n".join(results["documents"][0])
-            sources = results.get("metadatas", [[]])[0]
+        with stage("embedding"):
+            vectors = embedding_service.embed(queries)
+        if vectors is None:
+            return [("", [], []) for _ in queries]
+        hybrid = HYBRID_RETRIEVAL and lexical_index.ready and len(lexical_index) > 0
+        with stage("vector_query"):
+            results = collection.query(
+                query_embeddings=[v.tolist() for v in vectors],
+                n_results=max(n_results, RETRIEVAL_CANDIDATES) if hybrid else n_results,
+            )
+        if hybrid:
+            return _fuse(queries, results, n_results)
+        batch = []
+        for i in range(len(queries)):
+            documents = results["documents"][i] if results["documents"] else []
+            if not documents:
+                batch.append(("", [], []))
+                continue
+            sources = results["metadatas"][i] if results.get("metadatas") else []
             source_names = [s.get("source", "Unknown") for s in sources]
-            return context, source_names
-        return "", []
+            batch.append(("\n\n".join(documents), source_names, list(results["ids"][i])))
+        return batch
     except Exception as e:
         print(f"Context retrieval error: {e}")
-        return "", []
+        return [("", [], []) for _ in queries]
+
+
+def _fuse(queries: List[str], results: dict, n_results: int) -> List[Tuple[str, List[str], List[str]]]:
+    # Reciprocal-rank fusion of the vector and BM25 candidate lists; chunks only the
+    # lexical side found are fetched from the collection in one call.
+    with stage("lexical"):
+        lexical = [lexical_index.search(q, max(n_results, RETRIEVAL_CANDIDATES)) for q in queries]
+    documents, metadatas = {}, {}
+    for i in range(len(queries)):
+        ids = results["ids"][i] if results["ids"] else []
+        docs = results["documents"][i] if results.get("documents") else []
+        metas = results["metadatas"][i] if results.get("metadatas") else []
+        for j, chunk_id in enumerate(ids):
+            documents[chunk_id] = docs[j] if j < len(docs) else ""
+            metadatas[chunk_id] = (metas[j] if j < len(metas) else None) or {}
+    missing = {chunk_id for hits in lexical for chunk_id, _ in hits if chunk_id not in documents}
+    if missing:
+        fetched = collection.get(ids=list(missing), include=["documents", "metadatas"])
+        for j, chunk_id in enumerate(fetched["ids"]):
+            documents[chunk_id] = fetched["documents"][j]
+            metadatas[chunk_id] = fetched["metadatas"][j] or {}
+
+    batch = []
+    for i, query in enumerate(queries):
+        vector_ids = list(results["ids"][i]) if results["ids"] else []
+        lexical_ids = [chunk_id for chunk_id, _ in lexical[i] if chunk_id in documents]
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids], RETRIEVAL_RRF_K)
+        candidates = [(chunk_id, documents[chunk_id], score) for chunk_id, score in fused]
+        if RETRIEVAL_RERANK:
+            with stage("rerank"):
+                candidates = rerank(query, candidates)
+        top = candidates[:n_results]
+        if not top:
+            batch.append(("", [], []))
+            continue
+        batch.append(
+            (
+                "\n\n".join(text for _, text, _ in top),
+                [metadatas[chunk_id].get("source", "Unknown") for chunk_id, _, _ in top],
+                [chunk_id for chunk_id, _, _ in top],
+            )
+        )
+    return batch
+
+
+def build_lexical_index() -> int:
+    # Called from the background warm-up once the collection is open.
+    if collection is None:
+        raise RuntimeError("Vector store unavailable")
+    return lexical_index.build(collection)
+
+
+def retrieve_context(query: str, n_results: int = 3) -> Tuple[str, List[str]]:
+    context, source_names, _ = retrieve_chunks(query, n_results)
+    return context, source_names
+
+
+def open_collection():
+    # The serving store when vector retrieval is enabled, else a fresh handle (used by ingestion).
+    if CHROMA_ENABLED:
+        return init_vector_store()
+    if VECTOR_STORE == "local":
+        return _open_local_store()
+    fn = get_embedding_fn()
+    if fn is None:
+        return None
+    try:
+        import chromadb
+
+        client = chromadb.PersistentClient(path="./chroma_db")
+        return client.get_or_create_collection(name="cybersec_docs", embedding_function=fn)
+    except Exception as e:
+        print(f"Chroma init failed: {e}")
+        return None
 
 
 def vector_status() -> tuple[str, int]:
+    if CHROMA_ENABLED and not _init_attempted:
+        return "starting", 0
     status = "online" if collection else "offline"
     count = 0
     try:
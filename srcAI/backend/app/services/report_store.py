@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from ..config import REPORT_STORE_MAX_AGE, REPORT_STORE_MAX_BYTES, REPORTS_DIR
+
+
+# Seconds between full sweeps for expired reports, run from put().
+SWEEP_INTERVAL = 3600.0
+
+
+def report_key(analysis) -> str:
+    payload = json.dumps(analysis.model_dump(exclude={"cache_hit"}), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportStore:
+    # Rendered PDFs addressed by content hash, sharded two levels deep
+    # (<root>/ab/cd/<hash>.pdf) so no directory grows past a few hundred entries.
+    # A file's mtime is bumped on every hit and doubles as its LRU timestamp.
+
+    def __init__(self, root: str, max_bytes: int, max_age: float):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._total_bytes: int | None = None
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / f"{key}.pdf"
+
+    def get(self, key: str) -> Path | None:
+        path = self.path_for(key)
+        try:
+            stat = path.stat()
+            if self.max_age and time.time() - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                self._forget(stat.st_size)
+                return None
+            os.utime(path)
+            return path
+        except OSError:
+            return None
+
+    def put(self, key: str, content: bytes) -> Path:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(content)
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(content) - old_size
+            over_budget = self.max_bytes and self._total_bytes > self.max_bytes
+            # Expiry also runs below the size budget, at most once per SWEEP_INTERVAL.
+            sweep_due = self.max_age and time.time() - self._last_sweep > SWEEP_INTERVAL
+        if over_budget or sweep_due:
+            self.evict()
+        return path
+
+    def evict(self) -> None:
+        # Drops expired reports, then the least recently used until 90% of the budget.
+        with self._lock:
+            now = time.time()
+            self._last_sweep = now
+            entries = []
+            for path in self._iter_reports():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if self.max_age and now - stat.st_mtime > self.max_age:
+                    path.unlink(missing_ok=True)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9) if self.max_bytes else total
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+            self._total_bytes = total
+
+    def _forget(self, size: int) -> None:
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes = max(0, self._total_bytes - size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"bytes": self._total_bytes, "max_bytes": self.max_bytes}
+
+    def _iter_reports(self):
+        if not self.root.is_dir():
+            return
+        for level1 in os.scandir(self.root):
+            if not (level1.is_dir() and len(level1.name) == 2):
+                continue
+            for level2 in os.scandir(level1.path):
+                if not level2.is_dir():
+                    continue
+                for entry in os.scandir(level2.path):
+                    if entry.name.endswith(".pdf"):
+                        yield Path(entry.path)
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self._iter_reports():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+
+report_store = ReportStore(REPORTS_DIR, REPORT_STORE_MAX_BYTES, REPORT_STORE_MAX_AGE)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import numpy as np
+
+from ..config import SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD
+from .embeddings import embedding_service
+
+
+class SemanticCache:
+    # Fixed-size matrix of unit-normalized scenario embeddings; cosine similarity
+    # is a single matrix-vector product. The least recently used slot is evicted.
+
+    def __init__(self, capacity: int, threshold: float, enabled: bool = True):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.enabled = enabled and capacity > 0
+        self.hits = 0
+        self.misses = 0
+        self._vectors: np.ndarray | None = None
+        self._values: list[dict | None] = [None] * max(capacity, 0)
+        self._last_used = np.zeros(max(capacity, 0))
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> np.ndarray | None:
+        if not self.enabled:
+            return None
+        embeddings = embedding_service.embed([text])
+        if not embeddings:
+            return None
+        vector = embeddings[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, vector: np.ndarray) -> tuple[dict, float] | None:
+        with self._lock:
+            if self._size == 0 or self._vectors is None:
+                self.misses += 1
+                return None
+            scores = self._vectors[: self._size] @ vector
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = time.monotonic()
+            self.hits += 1
+            return self._values[best], similarity
+
+    def add(self, vector: np.ndarray, value: dict) -> None:
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+            self._vectors[slot] = vector
+            self._values[slot] = value
+            self._last_used[slot] = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": self._size,
+                "threshold": self.threshold,
+            }
+
+
+semantic_cache = SemanticCache(
+    capacity=SEMANTIC_CACHE_SIZE,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    enabled=SEMANTIC_CACHE_ENABLED,
+)
@@ -0,0 +1,505 @@
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from ..config import VECTOR_IVF_LISTS, VECTOR_IVF_PROBES, VECTOR_QUANTIZATION
+
+
+# Rows scored per matmul in an exhaustive scan; small enough that the dequantized
+# block stays in cache.
+BLOCK_ROWS = 4096
+# IVF centroids are only trained once each list would average this many rows.
+MIN_ROWS_PER_LIST = 39
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 100000
+FILES = {
+    "vectors": "bin",
+    "scales": "bin",
+    "lists": "bin",
+    "offsets": "bin",
+    "ids": "txt",
+    "records": "jsonl",
+    "alive": "bin",
+}
+
+
+class VectorStore(Protocol):
+    # The part of a Chroma collection the app relies on. Chroma collections satisfy
+    # it as they are; LocalVectorStore implements it over memory-mapped files.
+
+    def count(self) -> int: ...
+
+    def query(self, query_embeddings: list, n_results: int = 10) -> dict: ...
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        include: list[str] | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> dict: ...
+
+    def upsert(self, ids: list[str], documents=None, metadatas=None, embeddings=None) -> None: ...
+
+    def delete(self, ids: list[str]) -> None: ...
+
+
+def normalize(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantize(vectors, quantization: str) -> tuple[np.ndarray, np.ndarray | None]:
+    # Unit-normalizes, then keeps float16 or int8 with one scale per row.
+    vectors = normalize(vectors)
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+class LocalVectorStore:
+    # Cosine-similarity index in plain files under `path`, one set per generation:
+    # quantized vectors, per-row scales (int8), IVF list ids, chunk ids, and
+    # documents/metadata as JSON lines with an (offset, length) table. Every
+    # process maps the files read-only, so the OS page cache holds one copy for
+    # all uvicorn workers. Writes append rows and flip bytes in the `alive`
+    # file, whose length is the commit marker readers go by; compact() rewrites
+    # live rows into the next generation and swaps manifest.json. Only one
+    # process should write at a time.
+
+    def __init__(
+        self,
+        path: str,
+        quantization: str = VECTOR_QUANTIZATION,
+        ivf_lists: int = VECTOR_IVF_LISTS,
+        probes: int = VECTOR_IVF_PROBES,
+    ):
+        if quantization not in ("int8", "float16"):
+            raise ValueError(f"Unsupported vector quantization: {quantization}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.quantization = quantization
+        self.ivf_lists = ivf_lists
+        self.probes = max(1, probes)
+        self._lock = threading.RLock()
+        self._manifest: dict | None = None
+        self._manifest_key = None
+        self._writer: dict | None = None
+        self._reset()
+        self._refresh()
+
+    def _reset(self) -> None:
+        self._n = 0
+        self._vectors = self._scales = self._lists = self._offsets = self._alive = None
+        self._records = None
+        self._ids: list[str] = []
+        self._id_rows: dict[str, int] = {}
+        self._ids_bytes = 0
+        self._centroids: np.ndarray | None = None
+        self._groups = None
+
+    @property
+    def dim(self) -> int | None:
+        return self._manifest["dim"] if self._manifest else None
+
+    def _file(self, name: str, generation: int | None = None) -> Path:
+        if generation is None:
+            generation = self._manifest["generation"]
+        if name == "centroids":
+            return self.path / f"centroids-{generation}.npy"
+        return self.path / f"{name}-{generation}.{FILES[name]}"
+
+    # -- reading -----------------------------------------------------------
+
+    def _refresh(self) -> None:
+        # Cheap enough to run before every call: two stats unless something changed.
+        with self._lock:
+            for attempt in range(3):
+                try:
+                    stat = os.stat(self.path / "manifest.json")
+                    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                    if key != self._manifest_key:
+                        self._load_manifest(key)
+                    n = os.path.getsize(self._file("alive"))
+                    if n != self._n:
+                        self._map(n)
+                    return
+                except FileNotFoundError:
+                    # No store yet, or compacted away under us by another process.
+                    self._manifest_key = None
+                    if not (self.path / "manifest.json").exists():
+                        self._manifest = None
+                        self._reset()
+                        return
+            raise RuntimeError(f"Vector store at {self.path} keeps changing; is another process compacting it?")
+
+    def _load_manifest(self, key) -> None:
+        with open(self.path / "manifest.json", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._close_writer()
+        self._reset()
+        self._manifest = manifest
+        self._manifest_key = key
+        if manifest.get("lists"):
+            self._centroids = np.load(self._file("centroids"))
+
+    def _map(self, n: int) -> None:
+        if n == 0:
+            self._reset()
+            return
+        dim = self._manifest["dim"]
+        dtype = np.int8 if self._manifest["quantization"] == "int8" else np.float16
+        self._vectors = np.memmap(self._file("vectors"), dtype=dtype, mode="r", shape=(n, dim))
+        if self._manifest["quantization"] == "int8":
+            self._scales = np.memmap(self._file("scales"), dtype=np.float32, mode="r", shape=(n,))
+        self._lists = np.memmap(self._file("lists"), dtype=np.int32, mode="r", shape=(n,))
+        self._offsets = np.memmap(self._file("offsets"), dtype=np.int64, mode="r", shape=(n, 2))
+        with open(self._file("records"), "rb") as f:
+            self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if n > len(self._ids):
+            with open(self._file("ids"), "rb") as f:
+                f.seek(self._ids_bytes)
+                lines = f.read().split(b"\n")[: n - len(self._ids)]
+            for line in lines:
+                self._id_rows[line.decode("utf-8")] = len(self._ids)
+                self._ids.append(line.decode("utf-8"))
+                self._ids_bytes += len(line) + 1
+        self._alive = np.memmap(self._file("alive"), dtype=np.uint8, mode="r", shape=(n,))
+        self._n = n
+        self._groups = None
+
+    def _view(self) -> tuple:
+        # Arrays of the current generation; a query keeps using them even if a
+        # compaction swaps generations halfway through.
+        return self._n, self._vectors, self._scales, self._alive, self._offsets, self._records, self._ids
+
+    def _record(self, row: int, view: tuple | None = None) -> tuple[str, dict | None]:
+        _, _, _, _, offsets, records, _ = view or self._view()
+        start, length = offsets[row]
+        document, metadata = json.loads(records[start : start + length])
+        return document, metadata
+
+    def _dequantize(self, rows, view: tuple | None = None) -> np.ndarray:
+        _, vectors, scales, _, _, _, _ = view or self._view()
+        block = np.asarray(vectors[rows], dtype=np.float32)
+        if scales is not None:
+            block *= scales[rows][:, None]
+        return block
+
+    def _score(self, rows, queries: np.ndarray, view: tuple) -> np.ndarray:
+        # (rows, queries) cosine similarities; int8 scales apply to the scores,
+        # which is one multiply per row instead of one per element.
+        _, vectors, scales, _, _, _, _ = view
+        scores = np.asarray(vectors[rows], dtype=np.float32) @ queries.T
+        if scales is not None:
+            scores *= scales[rows][:, None]
+        return scores
+
+    def count(self) -> int:
+        self._refresh()
+        alive = self._alive
+        return int(np.count_nonzero(alive)) if alive is not None else 0
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        include: list[str] | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> dict:
+        # Documents and metadata share one record, so `include` costs nothing to ignore.
+        with self._lock:
+            self._refresh()
+            if self._alive is None:
+                rows = []
+            elif ids is not None:
+                rows = [self._id_rows[i] for i in ids if i in self._id_rows and self._alive[self._id_rows[i]]]
+            else:
+                live = np.flatnonzero(self._alive)
+                start = offset or 0
+                rows = live[start : start + limit if limit is not None else None].tolist()
+            records = [self._record(row) for row in rows]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [document for document, _ in records],
+                "metadatas": [metadata for _, metadata in records],
+            }
+
+    def query(self, query_embeddings: list, n_results: int = 10) -> dict:
+        # Scoring runs outside the lock; numpy releases the GIL, so concurrent
+        # retrievals overlap.
+        queries = normalize(query_embeddings)
+        with self._lock:
+            self._refresh()
+            view, centroids = self._view(), self._centroids
+            groups = self._ivf_groups() if centroids is not None and self.probes < len(centroids) else None
+        if not view[0]:
+            hits = [([], []) for _ in queries]
+        elif groups is not None:
+            hits = [self._search_ivf(q, n_results, view, centroids, groups) for q in queries]
+        else:
+            hits = self._search_all(queries, n_results, view)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for rows, scores in hits:
+            records = [self._record(row, view) for row in rows]
+            results["ids"].append([view[6][row] for row in rows])
+            results["documents"].append([document for document, _ in records])
+            results["metadatas"].append([metadata for _, metadata in records])
+            results["distances"].append([1.0 - s for s in scores])
+        return results
+
+    def _top(self, rows: np.ndarray, scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        if len(rows) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    def _search_all(self, queries: np.ndarray, k: int, view: tuple) -> list[tuple[list, list]]:
+        # One pass over the matrix for the whole batch of queries.
+        n, alive = view[0], view[3]
+        best = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+        for start in range(0, n, BLOCK_ROWS):
+            block = slice(start, min(n, start + BLOCK_ROWS))
+            live = np.flatnonzero(alive[block])
+            scores = self._score(block, queries, view)[live]
+            for i, (best_rows, best_scores) in enumerate(best):
+                rows, top = self._top(live + start, scores[:, i], k)
+                best[i] = self._top(np.concatenate([best_rows, rows]), np.concatenate([best_scores, top]), k)
+        return [(rows.tolist(), scores.tolist()) for rows, scores in best]
+
+    def _ivf_groups(self) -> tuple[np.ndarray, np.ndarray]:
+        # Row numbers ordered by list, with list v at order[bounds[v + 1]:bounds[v + 2]]
+        # and rows not yet assigned to a list (-1) first.
+        if self._groups is None:
+            lists = np.asarray(self._lists)
+            order = np.argsort(lists, kind="stable")
+            bounds = np.searchsorted(lists[order], np.arange(-1, len(self._centroids) + 1))
+            self._groups = (order, bounds)
+        return self._groups
+
+    def _search_ivf(self, q, k, view, centroids, groups) -> tuple[list, list]:
+        order, bounds = groups
+        alive = view[3]
+        probes = np.argpartition(-(centroids @ q), self.probes - 1)[: self.probes]
+        parts = [order[bounds[0] : bounds[1]]] + [order[bounds[p + 1] : bounds[p + 2]] for p in probes]
+        rows = np.sort(np.concatenate(parts))
+        rows = rows[alive[rows] == 1]
+        if not len(rows):
+            return [], []
+        rows, scores = self._top(rows, self._score(rows, q[None, :], view)[:, 0], k)
+        return rows.tolist(), scores.tolist()
+
+    # -- writing -----------------------------------------------------------
+
+    def _create(self, dim: int) -> None:
+        self._write_manifest({"version": 1, "generation": 0, "dim": dim, "quantization": self.quantization, "lists": 0})
+        for name in FILES:
+            self._file(name, 0).touch()
+        self._refresh()
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = self.path / "manifest.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.path / "manifest.json")
+        self._manifest = manifest
+
+    def _open_writer(self) -> dict:
+        if self._writer is None:
+            self._writer = {name: open(self._file(name), "ab") for name in FILES}
+            self._writer["tombstones"] = open(self._file("alive"), "r+b")
+        return self._writer
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            for f in self._writer.values():
+                f.close()
+            self._writer = None
+
+    def _assign(self, vectors: np.ndarray, scales: np.ndarray | None) -> np.ndarray:
+        if self._centroids is None:
+            return np.full(len(vectors), -1, dtype=np.int32)
+        block = vectors.astype(np.float32)
+        if scales is not None:
+            block *= scales[:, None]
+        return np.argmax(block @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _kill(self, ids) -> int:
+        tombstones = self._open_writer()["tombstones"]
+        killed = 0
+        for chunk_id in ids:
+            row = self._id_rows.get(chunk_id)
+            if row is not None and self._alive[row]:
+                tombstones.seek(row)
+                tombstones.write(b"\x00")
+                killed += 1
+        tombstones.flush()
+        return killed
+
+    def upsert(self, ids: list[str], documents=None, metadatas=None, embeddings=None) -> None:
+        # Adding an id that is already stored replaces it.
+        if embeddings is None:
+            raise ValueError("LocalVectorStore stores precomputed embeddings only")
+        documents = documents if documents is not None else [""] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        latest = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        keep = sorted(latest.values())
+        if any("\n" in chunk_id for chunk_id in latest):
+            raise ValueError("Chunk ids may not contain newlines")
+        vectors = np.asarray(embeddings, dtype=np.float32)[keep]
+        with self._lock:
+            self._refresh()
+            if self._manifest is None:
+                self._create(vectors.shape[1])
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store ({self.dim})")
+            quantized, scales = quantize(vectors, self._manifest["quantization"])
+            writer = self._open_writer()
+            self._kill(latest)
+            position = writer["records"].tell()
+            records, offsets = bytearray(), []
+            for i in keep:
+                record = (json.dumps([documents[i], metadatas[i]], ensure_ascii=False) + "\n").encode("utf-8")
+                offsets.append((position + len(records), len(record)))
+                records += record
+            writer["vectors"].write(quantized.tobytes())
+            if scales is not None:
+                writer["scales"].write(scales.tobytes())
+            writer["lists"].write(self._assign(quantized, scales).tobytes())
+            writer["offsets"].write(np.array(offsets, dtype=np.int64).tobytes())
+            writer["records"].write(records)
+            writer["ids"].write("".join(f"{ids[i]}\n" for i in keep).encode("utf-8"))
+            for name in FILES:
+                if name != "alive":
+                    writer[name].flush()
+            # Appending to `alive` last is what makes the rows visible.
+            writer["alive"].write(b"\x01" * len(keep))
+            writer["alive"].flush()
+            self._refresh()
+
+    def delete(self, ids: list[str]) -> None:
+        with self._lock:
+            self._refresh()
+            if self._manifest is None:
+                return
+            self._kill(ids)
+            self.maybe_compact()
+
+    def maybe_compact(self) -> bool:
+        # Compacts when tombstones pile up, when IVF is enabled but not trained yet,
+        # or when the store has doubled since the lists were trained.
+        with self._lock:
+            self._refresh()
+            if self._manifest is None:
+                return False
+            live = int(np.count_nonzero(self._alive)) if self._n else 0
+            dead = self._n - live
+            trained = self._manifest.get("trained_rows", 0)
+            wants_ivf = self.ivf_lists and live >= self.ivf_lists * MIN_ROWS_PER_LIST
+            if (
+                (dead > 1000 and dead > live // 4)
+                or (wants_ivf and (self._centroids is None or len(self._centroids) != self.ivf_lists))
+                or (wants_ivf and live > 2 * trained)
+                or self._manifest["quantization"] != self.quantization
+            ):
+                self.compact()
+                return True
+            return False
+
+    def compact(self) -> None:
+        # Rewrites live rows into the next generation: tombstones are dropped,
+        # IVF centroids are (re)trained when enabled and rows are stored list by
+        # list so a probe reads contiguous pages. Readers in other processes pick
+        # the new generation up on their next call.
+        with self._lock:
+            self._refresh()
+            if self._manifest is None:
+                return
+            live = np.flatnonzero(self._alive) if self._n else np.empty(0, dtype=np.int64)
+            centroids = None
+            if self.ivf_lists and len(live) >= self.ivf_lists * MIN_ROWS_PER_LIST:
+                centroids = self._train(live)
+            lists = np.full(len(live), -1, dtype=np.int32)
+            if centroids is not None:
+                for start in range(0, len(live), BLOCK_ROWS):
+                    rows = live[start : start + BLOCK_ROWS]
+                    lists[start : start + len(rows)] = np.argmax(self._dequantize(rows) @ centroids.T, axis=1)
+                order = np.argsort(lists, kind="stable")
+                live, lists = live[order], lists[order]
+
+            old = self._manifest["generation"]
+            generation = old + 1
+            files = {name: open(self._file(name, generation), "wb") for name in FILES}
+            try:
+                position = 0
+                for start in range(0, len(live), BLOCK_ROWS):
+                    rows = live[start : start + BLOCK_ROWS]
+                    quantized, scales = quantize(self._dequantize(rows), self.quantization)
+                    files["vectors"].write(quantized.tobytes())
+                    if scales is not None:
+                        files["scales"].write(scales.tobytes())
+                    files["lists"].write(lists[start : start + len(rows)].tobytes())
+                    offsets = []
+                    for row in rows:
+                        begin, length = self._offsets[row]
+                        files["records"].write(self._records[begin : begin + length])
+                        offsets.append((position, length))
+                        position += int(length)
+                    files["offsets"].write(np.array(offsets, dtype=np.int64).tobytes())
+                    files["ids"].write("".join(f"{self._ids[row]}\n" for row in rows).encode("utf-8"))
+                files["alive"].write(b"\x01" * len(live))
+            finally:
+                for f in files.values():
+                    f.close()
+            if centroids is not None:
+                np.save(self._file("centroids", generation), centroids)
+            self._close_writer()
+            self._write_manifest(
+                {
+                    "version": 1,
+                    "generation": generation,
+                    "dim": self._manifest["dim"],
+                    "quantization": self.quantization,
+                    "lists": len(centroids) if centroids is not None else 0,
+                    "trained_rows": len(live) if centroids is not None else 0,
+                }
+            )
+            self._reset()
+            self._refresh()
+            self._remove_stale(generation)
+
+    def _remove_stale(self, generation: int) -> None:
+        # Windows refuses to delete files another process still maps; those are
+        # retried after the next compaction.
+        for path in self.path.iterdir():
+            stem = path.name.rsplit(".", 1)[0]
+            name, _, suffix = stem.rpartition("-")
+            if (name in FILES or name == "centroids") and suffix.isdigit() and int(suffix) != generation:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _train(self, live: np.ndarray) -> np.ndarray:
+        # Spherical k-means on a sample of the live rows.
+        rng = np.random.default_rng(0)
+        size = min(len(live), KMEANS_SAMPLE, self.ivf_lists * 256)
+        sample = normalize(self._dequantize(np.sort(rng.choice(live, size=size, replace=False))))
+        centroids = sample[rng.choice(len(sample), self.ivf_lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.flatnonzero(np.bincount(assign, minlength=self.ivf_lists) == 0)
+            sums[empty] = sample[rng.choice(len(sample), len(empty))]
+            centroids = normalize(sums)
+        return centroids.astype(np.float32)
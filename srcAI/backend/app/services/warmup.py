@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import (
+    CASCADE_ENABLED,
+    CASCADE_SMALL_MODEL,
+    CHROMA_ENABLED,
+    CLASSIFIER_MODE,
+    CLASSIFIER_MODEL,
+    HYBRID_RETRIEVAL,
+    SEMANTIC_CACHE_ENABLED,
+    WARMUP_RETRY_SECONDS,
+)
+from .classifier import threat_classifier
+from .embeddings import embedding_service
+from .ollama_client import preload_model
+from .rag import build_lexical_index, init_vector_store
+
+
+class WarmupState:
+    # Per-step status for /api/ready. Only "critical" steps have to succeed;
+    # a failed vector store just means analyses run without retrieved context.
+    # Steps added with wait=False are reported but never hold readiness back.
+
+    def __init__(self):
+        self.steps: dict[str, dict] = {}
+
+    def add(self, name: str, critical: bool, wait: bool = True) -> None:
+        self.steps[name] = {"status": "pending", "critical": critical, "wait": wait, "seconds": None, "error": None}
+
+    def update(self, name: str, **fields) -> None:
+        self.steps[name].update(fields)
+
+    @property
+    def ready(self) -> bool:
+        for step in self.steps.values():
+            if not step["wait"]:
+                continue
+            if step["status"] in ("pending", "running"):
+                return False
+            if step["critical"] and step["status"] != "done":
+                return False
+        return bool(self.steps)
+
+    def snapshot(self) -> dict:
+        return {"ready": self.ready, "steps": {name: dict(step) for name, step in self.steps.items()}}
+
+
+warmup_state = WarmupState()
+
+
+async def _run_step(name: str, action, retry: bool = False) -> None:
+    warmup_state.update(name, status="running")
+    started = time.perf_counter()
+    while True:
+        try:
+            await action()
+            warmup_state.update(name, status="done", seconds=round(time.perf_counter() - started, 3), error=None)
+            return
+        except Exception as e:
+            warmup_state.update(name, error=str(e) or type(e).__name__)
+            if not retry:
+                warmup_state.update(name, status="failed", seconds=round(time.perf_counter() - started, 3))
+                return
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+
+async def _open_vector_store() -> None:
+    if await run_in_threadpool(init_vector_store) is None:
+        raise RuntimeError("Vector store unavailable")
+
+
+async def _load_embedding_model() -> None:
+    if await run_in_threadpool(embedding_service.embed, ["warm-up"]) is None:
+        raise RuntimeError("Embedding model unavailable")
+
+
+async def _build_lexical_index() -> None:
+    await run_in_threadpool(build_lexical_index)
+
+
+async def _load_classifier() -> None:
+    if not await run_in_threadpool(threat_classifier.load):
+        raise RuntimeError(f"No classifier model at {CLASSIFIER_MODEL}")
+
+
+async def _load_cascade_model() -> None:
+    # Not critical: query_cascade falls back to MODEL_NAME when the small model fails.
+    try:
+        await preload_model(CASCADE_SMALL_MODEL)
+    except Exception as e:
+        print(f"Cascade model {CASCADE_SMALL_MODEL} preload failed: {e}")
+        raise
+
+
+async def warm_up() -> None:
+    needs_embeddings = CHROMA_ENABLED or SEMANTIC_CACHE_ENABLED
+    warmup_state.add("embedding_model", critical=False)
+    warmup_state.add("vector_store", critical=False)
+    warmup_state.add("lexical_index", critical=False)
+    warmup_state.add("classifier", critical=False)
+    warmup_state.add("ollama_model", critical=True)
+    warmup_state.add("cascade_model", critical=False, wait=False)
+
+    async def local_steps():
+        if needs_embeddings:
+            await _run_step("embedding_model", _load_embedding_model)
+        else:
+            warmup_state.update("embedding_model", status="skipped")
+        if CHROMA_ENABLED:
+            await _run_step("vector_store", _open_vector_store)
+        else:
+            warmup_state.update("vector_store", status="skipped")
+        if CHROMA_ENABLED and HYBRID_RETRIEVAL:
+            await _run_step("lexical_index", _build_lexical_index)
+        else:
+            warmup_state.update("lexical_index", status="skipped")
+        if CLASSIFIER_MODE != "off" and os.path.exists(CLASSIFIER_MODEL):
+            await _run_step("classifier", _load_classifier)
+        else:
+            warmup_state.update("classifier", status="skipped")
+
+    async def model_steps():
+        await _run_step("ollama_model", preload_model, retry=True)
+        if CASCADE_ENABLED:
+            await _run_step("cascade_model", _load_cascade_model)
+        else:
+            warmup_state.update("cascade_model", status="skipped")
+
+    # Model loading on the Ollama host overlaps with the local embedding/Chroma load.
+    await asyncio.gather(local_steps(), model_steps())
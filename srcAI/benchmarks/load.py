@@ -0,0 +1,293 @@
+"""Offline load test: starts the mock Ollama server and the backend, then drives
+/api/analyze, /api/generate-report and /api/health at a fixed concurrency.
+
+Reports p50/p95/p99 latency, requests/sec and backend RSS, writes the results as
+JSON, and optionally compares them against a saved baseline.
+
+Usage (from the project root):
+    python -m benchmarks.load --concurrency 16 --requests 200 --output benchmarks/results/baseline.json
+    python -m benchmarks.load --baseline benchmarks/results/baseline.json [--tolerance 0.15]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from backend.app.services.metrics import percentile
+
+
+ROOT = Path(__file__).resolve().parent.parent
+ENDPOINTS = ("analyze", "report", "health")
+
+SCENARIOS = [
+    "Employee received an email from IT asking to reset their password via an external link",
+    "Unusual outbound traffic to a known Tor exit node from a finance workstation at 3am",
+    "Multiple failed SSH logins followed by a successful login from a new country",
+    "Ransom note found on a file server and files renamed with a .locked extension",
+    "A contractor's laptop is beaconing to a newly registered domain every 60 seconds",
+    "Web server logs show UNION SELECT payloads against the login form",
+]
+
+SAMPLE_ANALYSIS = {
+    "scenario": SCENARIOS[0],
+    "threat_type": "Phishing",
+    "severity": "High",
+    "analysis": "Credential harvesting email impersonating the IT helpdesk.",
+    "recommendations": ["Block the sender domain", "Reset affected credentials"],
+    "timestamp": "2025-01-01 00:00:00",
+    "context_sources": [],
+    "token_usage": 0,
+}
+
+
+def rss_mb(pid: int) -> float | None:
+    # Linux only; other platforms report null memory figures.
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def request_for(endpoint: str, i: int, distinct: int) -> tuple[str, str, dict | None]:
+    # distinct=0 makes every request unique so caches never hit.
+    n = i % distinct if distinct else i
+    scenario = f"{SCENARIOS[n % len(SCENARIOS)]} (case {n})"
+    if endpoint == "analyze":
+        return "POST", "/api/analyze", {"scenario": scenario}
+    if endpoint == "report":
+        return "POST", "/api/generate-report", dict(SAMPLE_ANALYSIS, scenario=scenario, case_id=f"bench-{n}")
+    return "GET", "/api/health", None
+
+
+async def wait_ready(url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient, pid: int, endpoint: str, requests: int, concurrency: int, distinct: int, warmup: int
+) -> dict:
+    for i in range(warmup):
+        method, path, body = request_for(endpoint, requests + i, distinct)
+        await client.request(method, path, json=body)
+
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    counter = iter(range(requests))
+    peak = rss_mb(pid)
+    done = asyncio.Event()
+
+    async def sample_memory():
+        nonlocal peak
+        while not done.is_set():
+            current = rss_mb(pid)
+            if current is not None:
+                peak = max(peak or 0.0, current)
+            await asyncio.sleep(0.1)
+
+    async def worker():
+        for i in counter:
+            method, path, body = request_for(endpoint, i, distinct)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    sampler = asyncio.create_task(sample_memory())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await sampler
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "statuses": statuses,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+        "rss_mb": rss_mb(pid),
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+    }
+
+
+def start(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *args], cwd=ROOT, env=env)
+
+
+async def run(args) -> dict:
+    env = dict(os.environ)
+    mock = start(
+        [
+            "benchmarks.mock_ollama",
+            "--port", str(args.mock_port),
+            "--latency-ms", str(args.latency_ms),
+            "--tokens-per-sec", str(args.tokens_per_sec),
+            "--tokens", str(args.tokens),
+            "--prompt-eval-ms-per-token", str(args.prompt_eval_ms_per_token),
+        ],
+        env,
+    )
+    reports_dir = tempfile.mkdtemp(prefix="cybersentinel-bench-")
+    env.update(
+        OLLAMA_URL=f"http://127.0.0.1:{args.mock_port}/api/generate",
+        OLLAMA_URLS=f"http://127.0.0.1:{args.mock_port}",
+        REPORTS_DIR=reports_dir,
+        CASE_STORE_DB=os.path.join(reports_dir, "cases.sqlite3"),
+        ANALYSIS_CACHE_DB="",
+        JOB_STORE_DB="",
+        ENABLE_SEMANTIC_CACHE="1" if args.semantic_cache else "0",
+    )
+    env.update(dict(item.split("=", 1) for item in args.env))
+    app = start(["benchmarks.serve_app", "--port", str(args.port)], env)
+
+    try:
+        await wait_ready(f"http://127.0.0.1:{args.mock_port}/api/tags")
+        await wait_ready(f"http://127.0.0.1:{args.port}/api/ready")
+        results = {}
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}", timeout=args.timeout, limits=limits
+        ) as client:
+            baseline_rss = rss_mb(app.pid)
+            for endpoint in args.endpoints:
+                results[endpoint] = await run_endpoint(
+                    client, app.pid, endpoint, args.requests, args.concurrency, args.distinct, args.warmup
+                )
+                print(format_row(endpoint, results[endpoint]), flush=True)
+    finally:
+        for proc in (app, mock):
+            proc.terminate()
+        for proc in (app, mock):
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    return {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "distinct": args.distinct,
+            "latency_ms": args.latency_ms,
+            "tokens_per_sec": args.tokens_per_sec,
+            "tokens": args.tokens,
+            "prompt_eval_ms_per_token": args.prompt_eval_ms_per_token,
+            "semantic_cache": args.semantic_cache,
+            "env": args.env,
+        },
+        "idle_rss_mb": baseline_rss,
+        "endpoints": results,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_row(endpoint: str, r: dict) -> str:
+    rss = f"{r['peak_rss_mb']:.0f}MB" if r["peak_rss_mb"] is not None else "n/a"
+    return (
+        f"{endpoint:<8} {r['rps']:>8.1f} req/s  p50 {r['p50_ms']:>8.1f}ms  p95 {r['p95_ms']:>8.1f}ms  "
+        f"p99 {r['p99_ms']:>8.1f}ms  errors {r['errors']:<4} peak rss {rss}"
+    )
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    # A regression is p95/p99 slower, or throughput lower, by more than `tolerance`.
+    regressions = []
+    for endpoint, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if before[key] and now[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{endpoint} {key}: {before[key]} -> {now[key]}")
+        if before["rps"] and now["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{endpoint} rps: {before['rps']} -> {now['rps']}")
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{endpoint} errors: {before['errors']} -> {now['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load benchmark against a mock Ollama")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated: analyze,report,health")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per endpoint")
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct payloads to cycle (0 = all unique, no cache hits)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Mock time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=200, help="Mock generation speed")
+    parser.add_argument("--tokens", type=int, default=60, help="Mock tokens per response")
+    parser.add_argument("--prompt-eval-ms-per-token", type=float, default=0.2, help="Mock cost per uncached prompt token")
+    parser.add_argument("--semantic-cache", action="store_true", help="Enable the semantic cache (stub embeddings)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra backend env vars")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--mock-port", type=int, default=11500)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+    args.endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Saved {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
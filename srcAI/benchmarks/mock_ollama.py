@@ -0,0 +1,137 @@
+"""Offline stand-in for an Ollama server, used by the load benchmarks.
+
+Serves /api/generate (streaming and non-streaming), /api/tags and /api/ps with a
+fixed analysis JSON, a configurable time-to-first-token and token rate. Prompt
+evaluation is charged per token, and like llama.cpp the tokens shared with the
+previous request's prefix (system prompt first, then prompt) are reused for free.
+
+Usage (from the project root):
+    python -m benchmarks.mock_ollama --port 11500 [--latency-ms 200] [--tokens-per-sec 40] [--tokens 120]
+        [--prompt-eval-ms-per-token 0.5]
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+RESPONSE = json.dumps(
+    {
+        "threat_type": "Phishing",
+        "severity": "High",
+        "analysis": "Credential harvesting email impersonating the IT helpdesk with a lookalike domain.",
+        "recommendations": [
+            "Block the sender domain at the mail gateway",
+            "Reset credentials for users who clicked the link",
+            "Run phishing awareness training",
+        ],
+    }
+)
+
+
+def split_tokens(text: str, count: int) -> list[str]:
+    # Roughly `count` pieces that concatenate back to `text`.
+    size = max(1, -(-len(text) // max(1, count)))
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def prompt_tokens(text: str) -> list[str]:
+    return re.findall(r"\w{1,4}|[^\w\s]", text)
+
+
+def create_app(
+    latency_ms: float = 200, tokens_per_sec: float = 40, tokens: int = 120, prompt_eval_ms_per_token: float = 0
+) -> FastAPI:
+    app = FastAPI(title="Mock Ollama")
+    app.state.requests = 0
+    app.state.cached = []
+
+    def evaluate(body: dict) -> tuple[int, float]:
+        # (tokens evaluated, seconds) after reusing the prefix cached from the last request.
+        full = prompt_tokens(body.get("system", "")) + ["<sep>"] + prompt_tokens(body.get("prompt", ""))
+        shared = 0
+        for cached, token in zip(app.state.cached, full):
+            if cached != token:
+                break
+            shared += 1
+        app.state.cached = full
+        evaluated = len(full) - shared
+        return evaluated, evaluated * prompt_eval_ms_per_token / 1000
+
+    def stats(prompt_eval: tuple[int, float], eval_count: int, started: float) -> dict:
+        total = time.perf_counter() - started
+        evaluated, eval_seconds = prompt_eval
+        return {
+            "model": "mock",
+            "done": True,
+            "prompt_eval_count": evaluated,
+            "eval_count": eval_count,
+            "load_duration": 0,
+            "prompt_eval_duration": int((latency_ms / 1000 + eval_seconds) * 1e9),
+            "eval_duration": int(max(0.0, total - latency_ms / 1000 - eval_seconds) * 1e9),
+            "total_duration": int(total * 1e9),
+        }
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        started = time.perf_counter()
+        if not body.get("prompt"):
+            # Load-only request, as in Ollama: the system prompt is not evaluated
+            return {"model": "mock", "response": "", "done": True}
+        prompt_eval = evaluate(body)
+        first_token = latency_ms / 1000 + prompt_eval[1]
+        pieces = split_tokens(RESPONSE, tokens)
+        delay = 1 / tokens_per_sec if tokens_per_sec > 0 else 0
+
+        if not body.get("stream", True):
+            await asyncio.sleep(first_token + delay * len(pieces))
+            return {"response": RESPONSE, **stats(prompt_eval, len(pieces), started)}
+
+        async def chunks():
+            await asyncio.sleep(first_token)
+            for piece in pieces:
+                yield json.dumps({"model": "mock", "response": piece, "done": False}) + "\n"
+                if delay:
+                    await asyncio.sleep(delay)
+            yield json.dumps({"response": "", **stats(prompt_eval, len(pieces), started)}) + "\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "mock", "model": "mock"}]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": "mock", "model": "mock", "size_vram": 0}]}
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return JSONResponse({"requests": app.state.requests})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Ollama server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency-ms", type=float, default=200, help="Time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=40, help="0 = emit all tokens at once")
+    parser.add_argument("--tokens", type=int, default=120, help="Tokens per response")
+    parser.add_argument("--prompt-eval-ms-per-token", type=float, default=0, help="Cost of each uncached prompt token")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.tokens_per_sec, args.tokens, args.prompt_eval_ms_per_token)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
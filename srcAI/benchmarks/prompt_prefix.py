@@ -0,0 +1,147 @@
+"""Prompt-eval cost of the old single-prompt layout vs the static system-prompt prefix.
+
+The old layout put the per-request context and scenario in the middle of the
+instructions, so Ollama could only reuse the first line of its KV cache. The
+current layout sends the instructions as a fixed system prompt and appends the
+variable part, so only that part is evaluated per request.
+
+Runs against the mock server by default; pass --url to measure a real Ollama.
+
+Usage (from the project root):
+    python -m benchmarks.prompt_prefix [--requests 20] [--url http://localhost:11434] [--model llama3.2]
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import httpx
+
+from backend.app.services.ollama_client import SAMPLING_OPTIONS, SYSTEM_PROMPT, prepare_prompt
+from benchmarks.load import ROOT, SCENARIOS, wait_ready
+
+
+CONTEXT = """Phishing emails impersonate trusted senders such as IT support or banks. They often contain links to credential harvesting pages hosted on lookalike domains.
+
+Ransomware operators commonly gain access through exposed RDP or stolen VPN credentials, then disable backups before encrypting file shares.
+
+Repeated failed logins followed by a success from a new location indicate password spraying or credential stuffing. Enforce MFA and alert on impossible travel."""
+
+
+def legacy_prompt(prompt: str, context: str) -> str:
+    return f"""You are CyberSentinel, an expert cybersecurity threat analyst.
+
+Context from knowledge base:
+{context}
+
+User Scenario: {prompt}
+
+Analyze this cybersecurity scenario and provide:
+1. Threat Type (e.g., Phishing, Malware, DDoS, Ransomware, Insider Threat, Social Engineering)
+2. Severity Level (Low, Medium, or High)
+3. Detailed Analysis (2-3 paragraphs)
+4. Mitigation Recommendations (specific, actionable steps)
+
+Format your response as JSON:
+{{
+    "threat_type": "...",
+    "severity": "...",
+    "analysis": "...",
+    "recommendations": ["...", "...", "..."]
+}}"""
+
+
+def payload(layout: str, scenario: str, model: str) -> dict:
+    body = {
+        "model": model,
+        "stream": False,
+        "keep_alive": "30m",
+        # Only prompt evaluation is measured, so keep generation to one token.
+        "options": {**SAMPLING_OPTIONS, "num_predict": 1},
+    }
+    if layout == "legacy":
+        body["prompt"] = legacy_prompt(scenario, CONTEXT)
+    else:
+        body["system"] = SYSTEM_PROMPT
+        body["prompt"] = prepare_prompt(scenario, CONTEXT)
+    return body
+
+
+async def measure(client: httpx.AsyncClient, url: str, layout: str, requests: int, model: str) -> dict:
+    counts, durations = [], []
+    # The first request primes the cache and is not counted.
+    for i in range(requests + 1):
+        scenario = f"{SCENARIOS[i % len(SCENARIOS)]} (case {i})"
+        response = await client.post(f"{url}/api/generate", json=payload(layout, scenario, model))
+        response.raise_for_status()
+        result = response.json()
+        if i:
+            counts.append(result.get("prompt_eval_count", 0))
+            durations.append(result.get("prompt_eval_duration", 0) / 1e6)
+    return {
+        "prompt_eval_tokens": round(sum(counts) / len(counts), 1),
+        "prompt_eval_ms": round(sum(durations) / len(durations), 2),
+    }
+
+
+async def run(args) -> dict:
+    mock = None
+    url = args.url
+    if not url:
+        url = f"http://127.0.0.1:{args.mock_port}"
+        mock = subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.mock_ollama",
+                "--port", str(args.mock_port),
+                "--latency-ms", "0",
+                "--prompt-eval-ms-per-token", str(args.prompt_eval_ms_per_token),
+            ],
+            cwd=ROOT,
+        )
+    try:
+        await wait_ready(f"{url}/api/tags")
+        async with httpx.AsyncClient(timeout=300) as client:
+            legacy = await measure(client, url, "legacy", args.requests, args.model)
+            prefix = await measure(client, url, "prefix", args.requests, args.model)
+    finally:
+        if mock:
+            mock.terminate()
+            mock.wait(timeout=10)
+    return {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "target": args.url or "mock",
+        "requests": args.requests,
+        "legacy": legacy,
+        "prefix": prefix,
+        "saved_tokens_per_request": round(legacy["prompt_eval_tokens"] - prefix["prompt_eval_tokens"], 1),
+        "saved_ms_per_request": round(legacy["prompt_eval_ms"] - prefix["prompt_eval_ms"], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prompt-eval time saved by the system-prompt prefix")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--url", help="Real Ollama base URL (default: start the mock)")
+    parser.add_argument("--model", default="llama3.2")
+    parser.add_argument("--mock-port", type=int, default=11501)
+    parser.add_argument("--prompt-eval-ms-per-token", type=float, default=0.5, help="Mock cost per uncached token")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    for layout in ("legacy", "prefix"):
+        r = results[layout]
+        print(f"{layout:<7} {r['prompt_eval_tokens']:>7.1f} tokens evaluated  {r['prompt_eval_ms']:>8.2f}ms prompt eval")
+    print(
+        f"saved   {results['saved_tokens_per_request']:>7.1f} tokens/request  "
+        f"{results['saved_ms_per_request']:>8.2f}ms/request"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Retrieval latency and recall@k: vector-only vs BM25 vs hybrid (RRF + rerank).
+
+Builds a synthetic threat-intel corpus where each query targets one chunk through
+an exact indicator (CVE id, IP, hash, malware family) plus a few paraphrased words.
+Vectors come from the hashed stub embedding with brute-force cosine search, standing
+in for Chroma so the run stays offline; BM25, fusion and rerank are the production code.
+
+Usage (from the project root):
+    python -m benchmarks.retrieval [--chunks 100000] [--queries 500] [--k 3] [--output results.json]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from backend.app.services.lexical import BM25Index, reciprocal_rank_fusion, rerank
+from backend.app.services.metrics import percentile
+from benchmarks.serve_app import StubEmbedding
+
+try:
+    import resource
+except ImportError:
+    # Windows has no resource module; memory growth is reported as null there.
+    resource = None
+
+
+VOCABULARY = (
+    "attacker malware payload credential phishing email domain server endpoint network "
+    "traffic lateral movement persistence registry scheduled task powershell script "
+    "beacon command control exfiltration archive encryption ransom backup privilege "
+    "escalation exploit vulnerability patch firewall proxy dns tunnel login password "
+    "account administrator service process memory injection loader dropper macro "
+    "document attachment user workstation finance helpdesk vpn remote desktop ssh "
+    "brute force spray token session cookie browser extension update supply chain"
+).split()
+# Zipf-weighted so a few security terms are everywhere and most words are rare,
+# as in real advisories.
+WORDS = VOCABULARY + [f"term{i}" for i in range(20000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+FAMILIES = ["emotet", "trickbot", "qakbot", "cobaltstrike", "lockbit", "blackcat", "redline", "asyncrat"]
+
+
+def indicator(rng: random.Random, i: int) -> str:
+    kind = i % 4
+    if kind == 0:
+        return f"CVE-{rng.randint(2015, 2025)}-{rng.randint(1000, 99999)}"
+    if kind == 1:
+        return ".".join(str(rng.randint(1, 254)) for _ in range(4))
+    if kind == 2:
+        return "%064x" % rng.getrandbits(256)
+    return f"{rng.choice(FAMILIES)}-{rng.randint(100, 999)}"
+
+
+def build_corpus(chunks: int, seed: int) -> tuple[list[str], list[str], list[str]]:
+    rng = random.Random(seed)
+    texts, indicators = [], []
+    for i in range(chunks):
+        words = rng.choices(WORDS, WEIGHTS, k=120)
+        ioc = indicator(rng, i)
+        words.insert(rng.randrange(len(words)), ioc)
+        texts.append(" ".join(words) + ".")
+        indicators.append(ioc)
+    return [f"chunk-{i}" for i in range(chunks)], texts, indicators
+
+
+def build_queries(texts: list[str], indicators: list[str], count: int, seed: int) -> list[tuple[str, int]]:
+    rng = random.Random(seed + 1)
+    queries = []
+    for target in rng.sample(range(len(texts)), count):
+        context = rng.sample(texts[target].rstrip(".").split(), 4)
+        noise = rng.choices(VOCABULARY, k=3)
+        queries.append((f"Alert mentions {indicators[target]} with {' '.join(context + noise)}", target))
+    return queries
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid retrieval latency and recall@k")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3, help="Results returned (recall@k)")
+    parser.add_argument("--candidates", type=int, default=20, help="Candidates per side before fusion")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    ids, texts, indicators = build_corpus(args.chunks, args.seed)
+    queries = build_queries(texts, indicators, args.queries, args.seed)
+
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    index = BM25Index()
+    for i in range(0, len(ids), 5000):
+        index.add(ids[i : i + 5000], texts[i : i + 5000])
+    build_s = time.perf_counter() - started
+    rss_after = peak_rss_mb()
+
+    embed = StubEmbedding()
+    matrix = np.vstack(embed(texts)).astype(np.float32)
+    query_vectors = embed([q for q, _ in queries])
+
+    timings = {"vector": [], "bm25": [], "hybrid": []}
+    hits = {"vector": 0, "bm25": 0, "hybrid": 0}
+    for (query, target), vector in zip(queries, query_vectors):
+        started = time.perf_counter()
+        sims = matrix @ vector
+        top = np.argpartition(-sims, args.candidates)[: args.candidates]
+        vector_ids = [ids[i] for i in top[np.argsort(-sims[top])]]
+        vector_s = time.perf_counter() - started
+        timings["vector"].append(vector_s)
+        hits["vector"] += ids[target] in vector_ids[: args.k]
+
+        started = time.perf_counter()
+        lexical_ids = [chunk_id for chunk_id, _ in index.search(query, args.candidates)]
+        bm25_s = time.perf_counter() - started
+        timings["bm25"].append(bm25_s)
+        hits["bm25"] += ids[target] in lexical_ids[: args.k]
+
+        # Hybrid latency excludes the vector search itself, which Chroma does either way.
+        started = time.perf_counter()
+        lexical_ids = [chunk_id for chunk_id, _ in index.search(query, args.candidates)]
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids])
+        candidates = [(chunk_id, texts[int(chunk_id.split("-")[1])], score) for chunk_id, score in fused]
+        ranked = [chunk_id for chunk_id, _, _ in rerank(query, candidates)]
+        timings["hybrid"].append(time.perf_counter() - started)
+        hits["hybrid"] += ids[target] in ranked[: args.k]
+
+    results = {
+        "chunks": args.chunks,
+        "queries": args.queries,
+        "k": args.k,
+        "bm25_build_s": round(build_s, 2),
+        "bm25_index": index.stats(),
+        "bm25_peak_rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None else None,
+        "methods": {
+            method: {
+                f"recall@{args.k}": round(hits[method] / args.queries, 3),
+                "p50_ms": round(percentile(timings[method], 50) * 1000, 3),
+                "p95_ms": round(percentile(timings[method], 95) * 1000, 3),
+                "p99_ms": round(percentile(timings[method], 99) * 1000, 3),
+            }
+            for method in timings
+        },
+    }
+    print(f"BM25 index: {args.chunks} chunks in {results['bm25_build_s']}s, {results['bm25_index']['terms']} terms")
+    for method, r in results["methods"].items():
+        print(
+            f"{method:<7} recall@{args.k} {r[f'recall@{args.k}']:.3f}  "
+            f"p50 {r['p50_ms']:.2f}ms  p95 {r['p95_ms']:.2f}ms  p99 {r['p99_ms']:.2f}ms"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Run the backend with a deterministic stub embedding function (no model download).
+
+The load driver starts this in a subprocess with OLLAMA_URL pointed at the mock server.
+
+Usage (from the project root):
+    python -m benchmarks.serve_app --port 8100
+"""
+import argparse
+import hashlib
+import os
+import re
+
+import numpy as np
+
+
+class StubEmbedding:
+    # Hashed bag-of-words: cheap, offline, and similar texts still land close together.
+    dim = 384
+
+    def __call__(self, texts):
+        vectors = []
+        for text in texts:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+                vector[int.from_bytes(digest[:4], "little") % self.dim] += (
+                    1.0 if digest[4] & 1 else -1.0
+                )
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+
+def install_stub_embedding():
+    from backend.app.services import embeddings
+
+    embeddings._embedding_fn = StubEmbedding()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the backend for benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    # Worker processes would load the real model, so keep embeddings in-process.
+    os.environ["EMBEDDING_PROCESSES"] = "0"
+    install_stub_embedding()
+
+    import uvicorn
+    from backend.app.main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
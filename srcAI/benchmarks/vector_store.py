@@ -0,0 +1,115 @@
+"""Local vector store: recall@k, query latency and on-disk size per layout.
+
+Builds a clustered synthetic embedding set (unit vectors around random topic
+centres, like MiniLM output over a threat-intel corpus) and compares exact
+float32 brute force against LocalVectorStore with float16 and int8 rows,
+exhaustive and with IVF lists. Recall is measured against the exact top-k.
+
+Usage (from the project root):
+    python -m benchmarks.vector_store [--vectors 100000] [--dim 384] [--queries 200] [--lists 256] [--output results.json]
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.services.metrics import percentile
+from backend.app.services.vector_store import LocalVectorStore, normalize
+
+
+def build_vectors(count: int, dim: int, topics: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = normalize(rng.normal(size=(topics, dim)))
+    labels = rng.integers(0, topics, size=count)
+    return normalize(centres[labels] + rng.normal(scale=1 / np.sqrt(dim), size=(count, dim)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quantized, memory-mapped vector store")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--lists", type=int, default=256, help="IVF lists for the partitioned runs")
+    parser.add_argument("--probes", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    vectors = build_vectors(args.vectors, args.dim, args.topics, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    noise = rng.normal(scale=0.02, size=(args.queries, args.dim))
+    queries = normalize(vectors[rng.choice(args.vectors, args.queries)] + noise)
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+
+    exact, timings = [], []
+    for q in queries:
+        started = time.perf_counter()
+        sims = vectors @ q
+        top = np.argpartition(-sims, args.k)[: args.k]
+        timings.append(time.perf_counter() - started)
+        exact.append({ids[i] for i in top})
+    results = {
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "k": args.k,
+        "layouts": {
+            "float32-exact": {
+                f"recall@{args.k}": 1.0,
+                "p50_ms": round(percentile(timings, 50) * 1000, 3),
+                "p95_ms": round(percentile(timings, 95) * 1000, 3),
+                "vector_mb": round(vectors.nbytes / 1e6, 1),
+            }
+        },
+    }
+
+    layouts = [("float16", 0), ("int8", 0), ("float16", args.lists), ("int8", args.lists)]
+    for quantization, lists in layouts:
+        name = f"{quantization}-{'ivf' if lists else 'flat'}"
+        with tempfile.TemporaryDirectory() as tmp:
+            store = LocalVectorStore(tmp, quantization=quantization, ivf_lists=lists, probes=args.probes)
+            started = time.perf_counter()
+            for i in range(0, args.vectors, 5000):
+                store.upsert(
+                    ids[i : i + 5000],
+                    documents=[""] * len(ids[i : i + 5000]),
+                    metadatas=[{"source": "bench"}] * len(ids[i : i + 5000]),
+                    embeddings=vectors[i : i + 5000],
+                )
+            store.maybe_compact()
+            build_s = time.perf_counter() - started
+            # A fresh reader, as a second uvicorn worker would open it.
+            reader = LocalVectorStore(tmp, quantization=quantization, ivf_lists=lists, probes=args.probes)
+            hits, timings = 0, []
+            for q, expected in zip(queries, exact):
+                started = time.perf_counter()
+                found = reader.query([q], args.k)["ids"][0]
+                timings.append(time.perf_counter() - started)
+                hits += len(expected.intersection(found))
+            vector_bytes = sum(
+                p.stat().st_size for p in Path(tmp).iterdir() if p.name.startswith(("vectors-", "scales-"))
+            )
+            results["layouts"][name] = {
+                f"recall@{args.k}": round(hits / (args.k * args.queries), 3),
+                "p50_ms": round(percentile(timings, 50) * 1000, 3),
+                "p95_ms": round(percentile(timings, 95) * 1000, 3),
+                "vector_mb": round(vector_bytes / 1e6, 1),
+                "build_s": round(build_s, 2),
+            }
+
+    for name, r in results["layouts"].items():
+        print(
+            f"{name:<14} recall@{args.k} {r[f'recall@{args.k}']:.3f}  "
+            f"p50 {r['p50_ms']:.2f}ms  p95 {r['p95_ms']:.2f}ms  vectors {r['vector_mb']}MB"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
@@ -14,13 +17,24 @@ except Exception:
 
 # Default: keep Chroma off to avoid model downloads when offline.
 CHROMA_ENABLED = os.getenv("ENABLE_CHROMA", "0") == "1"
-import requests
+import httpx
 import json
 from pathlib import Path
 from fpdf import FPDF
 import uuid
 
-app = FastAPI(title="CyberSentinel API")
+# Shared async HTTP client so Ollama calls never block the event loop
+ollama_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(120.0, connect=5.0),
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0),
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await ollama_client.aclose()
+
+app = FastAPI(title="CyberSentinel API", lifespan=lifespan)
 
 # Runtime config (env-overridable)
 ALLOWED_ORIGINS = os.getenv(
@@ -83,7 +97,7 @@ class ThreatAnalysis(BaseModel):
     timestamp: str
     token_usage: int
 
-def query_ollama(prompt: str, context: str = "") -> tuple[str, int]:
+async def query_ollama(prompt: str, context: str = "") -> tuple[str, int]:
     """Query Ollama local LLM"""
     full_prompt = f"""You are CyberSentinel, an expert cybersecurity threat analyst.
 
@@ -107,7 +121,7 @@ Format your response as JSON:
 }}"""
 
     try:
-        response = requests.post(
+        response = await ollama_client.post(
             OLLAMA_URL,
             json={
                 "model": MODEL_NAME,
@@ -117,8 +131,7 @@ Format your response as JSON:
                     "temperature": 0.7,
                     "top_p": 0.9
                 }
-            },
-            timeout=120
+            }
         )
         
         if response.status_code == 200:
@@ -138,11 +151,13 @@ Format your response as JSON:
         else:
             raise Exception(f"Ollama error: {response.status_code}")
     
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         raise HTTPException(
             status_code=503,
             detail="Cannot connect to Ollama. Please ensure Ollama is running on localhost:11434"
         )
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Ollama request timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -238,10 +253,10 @@ async def analyze_threat(scenario: ThreatScenario):
     """Analyze a cybersecurity threat scenario"""
     try:
         # Retrieve context from vector DB
-        context, sources = retrieve_context(scenario.scenario)
+        context, sources = await run_in_threadpool(retrieve_context, scenario.scenario)
         
         # Query Ollama with context
-        response, token_count = query_ollama(scenario.scenario, context)
+        response, token_count = await query_ollama(scenario.scenario, context)
         
         # Parse JSON response
         try:
@@ -277,7 +292,7 @@ async def analyze_threat(scenario: ThreatScenario):
 async def generate_report(analysis: ThreatAnalysis):
     """Generate and download PDF report"""
     try:
-        pdf_path = generate_pdf_report(analysis)
+        pdf_path = await run_in_threadpool(generate_pdf_report, analysis)
         return FileResponse(
             pdf_path,
             media_type="application/pdf",
@@ -293,7 +308,7 @@ async def health_check():
         # Check Ollama connection
         ollama_status = "offline"
         try:
-            ollama_response = requests.get("http://localhost:11434/api/tags", timeout=5)
+            ollama_response = await ollama_client.get("http://localhost:11434/api/tags", timeout=5)
             ollama_status = "online" if ollama_response.status_code == 200 else "offline"
         except Exception:
             ollama_status = "offline"
@@ -0,0 +1,38 @@
+"""Index a directory of threat-intel documents into the cybersec_docs collection.
+
+Usage (from the project root):
+    python ingest_documents.py knowledge_base [--force] [--workers N] [--batch-size N]
+"""
+import argparse
+import time
+
+from backend.app.config import INGEST_BATCH_SIZE, INGEST_CHUNK_OVERLAP, INGEST_CHUNK_SIZE, INGEST_WORKERS
+from backend.app.services.ingest import check_chunking, ingest_directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest .txt/.md/.pdf documents into ChromaDB")
+    parser.add_argument("directory", help="Directory to scan recursively")
+    parser.add_argument("--force", action="store_true", help="Re-index files even if unchanged")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Embedding processes (0 = inline)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Chunks per embedding batch")
+    args = parser.parse_args()
+    try:
+        check_chunking(INGEST_CHUNK_SIZE, INGEST_CHUNK_OVERLAP)
+    except ValueError as e:
+        parser.error(f"{e}; check INGEST_CHUNK_SIZE / INGEST_CHUNK_OVERLAP")
+
+    started = time.perf_counter()
+    stats = ingest_directory(
+        args.directory, workers=args.workers, batch_size=args.batch_size, force=args.force, use_processes=True
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"Indexed {stats['files_indexed']} files ({stats['chunks']} chunks), "
+        f"skipped {stats['files_skipped']} unchanged, removed {stats['files_removed']} "
+        f"in {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Train and evaluate the fast-path threat pre-classifier from stored analyses.
+
+Trains on the LLM analyses in the case store (plus optional JSON-lines files of
+ThreatAnalysis objects), reports hold-out accuracy, accuracy and coverage at each
+confidence threshold, and per-prediction latency, then refits on everything and
+saves the model for the backend (CLASSIFIER_MODEL).
+
+Usage (from the project root):
+    python train_classifier.py [--cases cases.sqlite3] [--data seed.jsonl] [--output classifier.pkl]
+    python train_classifier.py --evaluate-only [--output classifier.pkl]
+"""
+import argparse
+import json
+import random
+import time
+
+from backend.app.config import CASE_STORE_DB, CLASSIFIER_MIN_EXAMPLES, CLASSIFIER_MODEL
+from backend.app.services.cases import CaseStore
+from backend.app.services.classifier import ThreatClassifier, training_examples
+from backend.app.services.metrics import percentile
+
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+
+
+def load_analyses(cases_db: str, data_files: list[str]) -> list[dict]:
+    analyses = []
+    store = CaseStore(cases_db)
+    cursor = None
+    while True:
+        items, cursor = store.search(limit=1000, cursor=cursor)
+        analyses.extend(items)
+        if cursor is None:
+            break
+    for path in data_files:
+        with open(path, encoding="utf-8") as f:
+            analyses.extend(json.loads(line) for line in f if line.strip())
+    return analyses
+
+
+def evaluate(classifier: ThreatClassifier, rows: list[dict]) -> dict:
+    predictions, latencies = [], []
+    for row in rows:
+        started = time.perf_counter()
+        predictions.append(classifier.predict(row["scenario"]))
+        latencies.append(time.perf_counter() - started)
+    correct = {
+        field: [p[field] == row[field] for p, row in zip(predictions, rows)] for field in ("threat_type", "severity")
+    }
+    both = [t and s for t, s in zip(correct["threat_type"], correct["severity"])]
+    report = {
+        "examples": len(rows),
+        "threat_type_accuracy": round(sum(correct["threat_type"]) / len(rows), 3),
+        "severity_accuracy": round(sum(correct["severity"]) / len(rows), 3),
+        "both_accuracy": round(sum(both) / len(rows), 3),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+        },
+        "thresholds": {},
+    }
+    # What CLASSIFIER_THRESHOLD would answer without the LLM, and how often it would be right.
+    for threshold in THRESHOLDS:
+        answered = [ok for p, ok in zip(predictions, both) if p["confidence"] >= threshold]
+        report["thresholds"][str(threshold)] = {
+            "coverage": round(len(answered) / len(rows), 3),
+            "accuracy": round(sum(answered) / len(answered), 3) if answered else None,
+        }
+    return report
+
+
+def print_report(title: str, report: dict) -> None:
+    print(
+        f"{title}: {report['examples']} analyses, threat_type {report['threat_type_accuracy']:.1%}, "
+        f"severity {report['severity_accuracy']:.1%}, both {report['both_accuracy']:.1%}; "
+        f"latency p50 {report['latency_ms']['p50']:.3f}ms p99 {report['latency_ms']['p99']:.3f}ms"
+    )
+    for threshold, result in report["thresholds"].items():
+        accuracy = f"{result['accuracy']:.1%}" if result["accuracy"] is not None else "-"
+        print(f"  confidence >= {threshold:<5} answers {result['coverage']:.1%}, correct {accuracy}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the fast-path threat pre-classifier")
+    parser.add_argument("--cases", default=CASE_STORE_DB, help="Case store SQLite file to train from")
+    parser.add_argument("--data", action="append", default=[], help="Extra JSON-lines file of analyses (repeatable)")
+    parser.add_argument("--output", default=CLASSIFIER_MODEL, help="Model file to write (or evaluate)")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Hold-out share for evaluation")
+    parser.add_argument("--min-examples", type=int, default=CLASSIFIER_MIN_EXAMPLES, help="Minimum analyses per threat type")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--evaluate-only", action="store_true", help="Score the saved model on all analyses")
+    parser.add_argument("--report", help="Write the evaluation JSON here")
+    args = parser.parse_args()
+
+    rows = training_examples(load_analyses(args.cases, args.data))
+    classifier = ThreatClassifier(args.output)
+    if args.evaluate_only:
+        if not classifier.load():
+            raise SystemExit(f"No model at {args.output}")
+        # Includes the analyses the model was trained on, so this is an upper bound.
+        report = evaluate(classifier, [row for row in rows if row["threat_type"] in classifier.model["classes"]])
+        print_report("Saved model", report)
+    else:
+        random.Random(args.seed).shuffle(rows)
+        split = int(len(rows) * (1 - args.test_size))
+        started = time.perf_counter()
+        classifier.train(rows[:split], min_examples=args.min_examples)
+        train_s = time.perf_counter() - started
+        holdout = [row for row in rows[split:] if row["threat_type"] in classifier.model["classes"]]
+        if not holdout:
+            raise SystemExit("No hold-out analyses of the trained threat types; add data or raise --test-size")
+        report = evaluate(classifier, holdout)
+        report["train_s"] = round(train_s, 3)
+        print_report("Hold-out", report)
+
+        summary = classifier.train(rows, min_examples=args.min_examples)
+        classifier.save()
+        report["model"] = summary
+        print(f"Saved {args.output}: {summary['examples']} analyses, {len(summary['threat_types'])} threat types")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()